@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TemplateAnalytics
+from .models import TemplateAnalytics, TemplateLatencySketch
 
 
 @admin.register(TemplateAnalytics)
@@ -7,3 +7,11 @@ class TemplateAnalyticsAdmin(admin.ModelAdmin):
     list_display = ('template', 'date', 'execution_count', 'success_count', 'failure_count', 'total_cost_usd', 'avg_latency_ms')
     list_filter = ('date',)
     search_fields = ('template__title',)
+
+
+@admin.register(TemplateLatencySketch)
+class TemplateLatencySketchAdmin(admin.ModelAdmin):
+    list_display = ('template', 'provider', 'model', 'date', 'count', 'min_ms', 'max_ms')
+    list_filter = ('date', 'provider')
+    search_fields = ('template__title', 'model')
+    exclude = ('buckets',)
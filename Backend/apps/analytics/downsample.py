@@ -0,0 +1,66 @@
+"""
+Downsampling of time series for charts.
+
+Both functions take x (increasing) and y arrays and return the sorted
+indices of the points to keep, always including the first and last point.
+
+lttb: Largest-Triangle-Three-Buckets (Steinarsson, 2013). The inner points
+are split into threshold - 2 buckets, and from each bucket it keeps the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket, which preserves the visual shape of the line.
+
+min_max: keeps the lowest and the highest point of each of (threshold - 2) / 2
+buckets, so every spike and dip survives at the cost of a noisier line.
+"""
+import numpy as np
+
+MODES = ('lttb', 'min_max')
+
+
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket i covers [edges[i], edges[i + 1]); each holds at least one point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        low, high = edges[i], edges[i + 1]
+        next_low, next_high = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        average_x = x[next_low:next_high].mean()
+        average_y = y[next_low:next_high].mean()
+        # Twice the triangle areas; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - average_x) * (y[low:high] - y[previous])
+            - (x[previous] - x[low:high]) * (average_y - y[previous])
+        )
+        previous = low + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def min_max(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, (threshold - 2) // 2 + 1).astype(int)
+    kept = [0, n - 1]
+    for low, high in zip(edges[:-1], edges[1:]):
+        if high > low:
+            chunk = y[low:high]
+            kept.append(low + int(np.argmin(chunk)))
+            kept.append(low + int(np.argmax(chunk)))
+    return np.unique(kept)
+
+
+def downsample(x, y, threshold, mode='lttb'):
+    if mode == 'lttb':
+        return lttb(x, y, threshold)
+    if mode == 'min_max':
+        return min_max(x, y, threshold)
+    raise ValueError(f'Unknown downsampling mode: {mode}')
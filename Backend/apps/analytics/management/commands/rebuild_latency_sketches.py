@@ -0,0 +1,21 @@
+"""
+Recompute latency sketches from recorded executions
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.analytics.services.latency_service import LatencyService
+
+
+class Command(BaseCommand):
+    help = "Rebuild TemplateLatencySketch rows from executions (all history, or the last --days)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Only rebuild this many recent days.")
+
+    def handle(self, *args, **options):
+        start = None
+        if options['days'] is not None:
+            start = timezone.localdate() - timedelta(days=options['days'])
+        written = LatencyService.rebuild(start)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} latency sketch(es)"))
@@ -0,0 +1,17 @@
+"""
+Recompute the usage counters on PromptTemplate from recorded executions
+"""
+from django.core.management.base import BaseCommand
+from apps.analytics.services.template_usage_service import TemplateUsageService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute execution_count, success_count, last_executed_at and total_cost on every template "
+        "(after deleting executions, or to repair drift). Executions completing meanwhile may be missed; "
+        "run it again if so."
+    )
+
+    def handle(self, *args, **options):
+        changed = TemplateUsageService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Updated usage counters on {changed} template(s)"))
@@ -0,0 +1,32 @@
+"""
+Fold new executions and feedback into the TemplateAnalytics rollups and usage cube
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.analytics.models import RollupWatermark, TemplateAnalytics, UsageCube
+from apps.analytics.services.rollup_service import WATERMARKS, RollupService
+
+
+class Command(BaseCommand):
+    help = "Run one TemplateAnalytics / UsageCube rollup window (the beat task does this every five minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Delete all rollups (daily and usage cube) and watermarks first, then backfill from the beginning.",
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                marks = RollupWatermark.objects.select_for_update().filter(name__in=WATERMARKS)
+                list(marks)  # wait for a running rollup to finish
+                TemplateAnalytics.objects.all().delete()
+                UsageCube.objects.all().delete()
+                marks.delete()
+        result = RollupService.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {result['start']:%Y-%m-%d %H:%M:%S} to {result['end']:%Y-%m-%d %H:%M:%S}: "
+            f"{result['rows_upserted']} daily row(s) and {result['cube_rows_upserted']} cube cell(s) upserted, "
+            f"{result['ratings_refreshed']} rating(s) refreshed"
+        ))
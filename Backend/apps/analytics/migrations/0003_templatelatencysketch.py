@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0006_promptblob_delta'),
+        ('analytics', '0002_templateanalytics_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplateLatencySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sum_ms', models.PositiveBigIntegerField(default=0)),
+                ('min_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('buckets', models.JSONField(default=dict)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latency_sketches', to='prompts.prompttemplate')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('template', 'provider', 'model', 'date')},
+            },
+        ),
+    ]
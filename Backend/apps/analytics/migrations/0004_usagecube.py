@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('prompts', '0006_promptblob_delta'),
+        ('analytics', '0003_templatelatencysketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('provider', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('execution_count', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('total_tokens', models.PositiveBigIntegerField(default=0)),
+                ('cost_usd', models.DecimalField(decimal_places=6, default=0, max_digits=14)),
+                ('latency_sum_ms', models.PositiveBigIntegerField(default=0)),
+                ('latency_count', models.PositiveIntegerField(default=0)),
+                ('template', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='prompts.prompttemplate')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['user', 'hour'], name='analytics_u_user_id_12424f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usagecube',
+            constraint=models.UniqueConstraint(models.F('hour'), django.db.models.functions.comparison.Coalesce('user', models.Value(0)), django.db.models.functions.comparison.Coalesce('template', models.Value(0)), models.F('provider'), models.F('model'), models.F('status'), name='analytics_usagecube_cell'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0006_promptblob_delta'),
+        ('analytics', '0004_usagecube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplateDistinctSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('users_hll', models.BinaryField()),
+                ('inputs_hll', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='distinct_sketches', to='prompts.prompttemplate')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('template', 'date')},
+            },
+        ),
+    ]
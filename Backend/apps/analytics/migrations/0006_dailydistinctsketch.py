@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-19 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_templatedistinctsketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDistinctSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('users_hll', models.BinaryField()),
+                ('inputs_hll', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
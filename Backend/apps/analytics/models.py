@@ -1,9 +1,12 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from apps.prompts.models import PromptTemplate
 
 
 class TemplateAnalytics(models.Model):
-    """Aggregated daily stats per template — populated by a Celery beat task."""
+    """Aggregated daily stats per template — populated by the rollup_template_analytics beat task."""
     template = models.ForeignKey(
         PromptTemplate, on_delete=models.CASCADE, related_name="analytics"
     )
@@ -15,7 +18,98 @@ class TemplateAnalytics(models.Model):
     total_cost_usd = models.DecimalField(max_digits=12, decimal_places=6, default=0)
     avg_latency_ms = models.FloatField(null=True, blank=True)
     avg_rating = models.FloatField(null=True, blank=True)
+    # Sums behind the averages, so increments and range queries stay exact
+    latency_sum_ms = models.PositiveBigIntegerField(default=0)
+    latency_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("template", "date")
         ordering = ["-date"]
+
+
+class TemplateLatencySketch(models.Model):
+    """Daily latency distribution per template, provider and model (see apps/analytics/sketch.py)."""
+    template = models.ForeignKey(
+        PromptTemplate, on_delete=models.CASCADE, related_name="latency_sketches"
+    )
+    provider = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    sum_ms = models.PositiveBigIntegerField(default=0)
+    min_ms = models.PositiveIntegerField(null=True, blank=True)
+    max_ms = models.PositiveIntegerField(null=True, blank=True)
+    buckets = models.JSONField(default=dict)  # {bucket key: count}
+
+    class Meta:
+        unique_together = ("template", "provider", "model", "date")
+        ordering = ["-date"]
+
+
+class TemplateDistinctSketch(models.Model):
+    """A day's HyperLogLog sketches of distinct users and inputs per template, in Redis' format."""
+    template = models.ForeignKey(
+        PromptTemplate, on_delete=models.CASCADE, related_name="distinct_sketches"
+    )
+    date = models.DateField()
+    users_hll = models.BinaryField()
+    inputs_hll = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("template", "date")
+        ordering = ["-date"]
+
+
+class DailyDistinctSketch(models.Model):
+    """A day's HyperLogLog sketches of distinct users and inputs over all templates, in Redis' format."""
+    date = models.DateField(unique=True)
+    users_hll = models.BinaryField()
+    inputs_hll = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+
+
+class UsageCube(models.Model):
+    """Hourly execution totals per user, template, provider, model and status — populated by the rollup task."""
+    hour = models.DateTimeField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="+")
+    template = models.ForeignKey(
+        PromptTemplate, on_delete=models.CASCADE, null=True, related_name="usage"
+    )
+    provider = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    status = models.CharField(max_length=20)
+    execution_count = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    total_tokens = models.PositiveBigIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=14, decimal_places=6, default=0)
+    latency_sum_ms = models.PositiveBigIntegerField(default=0)
+    latency_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-hour"]
+        constraints = [
+            # Unknown user/template (deleted version) share one cell per hour
+            models.UniqueConstraint(
+                "hour", Coalesce("user", Value(0)), Coalesce("template", Value(0)),
+                "provider", "model", "status",
+                name="analytics_usagecube_cell",
+            ),
+        ]
+        indexes = [models.Index(fields=["user", "hour"])]
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has consumed its source table (exclusive upper bound)."""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
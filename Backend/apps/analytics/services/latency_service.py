@@ -0,0 +1,119 @@
+"""
+Service for latency percentile sketches
+"""
+from datetime import datetime, time
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.analytics.models import TemplateLatencySketch
+from apps.analytics.sketch import LOG_GAMMA, LatencySketch, bucket_key
+
+# One row lock per (template, provider, model, day); the bucket is incremented in place
+RECORD_SQL = """
+    INSERT INTO analytics_templatelatencysketch AS s (
+        template_id, provider, model, date, count, sum_ms, min_ms, max_ms, buckets
+    )
+    VALUES (%(template_id)s, %(provider)s, %(model)s, %(date)s, 1, %(latency)s, %(latency)s, %(latency)s,
+            jsonb_build_object(%(key)s::text, 1))
+    ON CONFLICT (template_id, provider, model, date) DO UPDATE SET
+        count = s.count + 1,
+        sum_ms = s.sum_ms + EXCLUDED.sum_ms,
+        min_ms = LEAST(s.min_ms, EXCLUDED.min_ms),
+        max_ms = GREATEST(s.max_ms, EXCLUDED.max_ms),
+        buckets = s.buckets || jsonb_build_object(
+            %(key)s::text, COALESCE((s.buckets ->> %(key)s::text)::bigint, 0) + 1
+        )
+"""
+
+# Same bucketing as sketch.bucket_key, computed in SQL
+REBUILD_SQL = """
+    WITH buckets AS (
+        SELECT v.template_id, e.provider, e.model,
+               (e.executed_at AT TIME ZONE %(tz)s)::date AS day,
+               CEIL(LN(GREATEST(e.latency_ms, 1)) / %(log_gamma)s)::int AS key,
+               COUNT(*) AS n, SUM(e.latency_ms) AS sum_ms,
+               MIN(e.latency_ms) AS min_ms, MAX(e.latency_ms) AS max_ms
+        FROM execution_execution e
+        JOIN prompts_promptversion v ON v.id = e.version_id
+        WHERE e.latency_ms IS NOT NULL AND e.executed_at >= %(start)s
+        GROUP BY 1, 2, 3, 4, 5
+    )
+    INSERT INTO analytics_templatelatencysketch (
+        template_id, provider, model, date, count, sum_ms, min_ms, max_ms, buckets
+    )
+    SELECT template_id, provider, model, day, SUM(n), SUM(sum_ms), MIN(min_ms), MAX(max_ms),
+           jsonb_object_agg(key::text, n)
+    FROM buckets
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+class LatencyService:
+    """
+    Per-day latency sketches for each (template, provider, model), recorded
+    as executions complete and merged at read time, so percentiles over any
+    date range read one row per key and day rather than the executions.
+    """
+
+    GROUP_FIELDS = {'template': 'template_id', 'provider': 'provider', 'model': 'model'}
+
+    @staticmethod
+    def record(execution):
+        """Add a completed execution's latency to its day's sketch."""
+        if execution.latency_ms is None or execution.version_id is None:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(RECORD_SQL, {
+                'template_id': execution.version.template_id,
+                'provider': execution.provider,
+                'model': execution.model,
+                'date': timezone.localtime(execution.executed_at).date(),
+                'latency': execution.latency_ms,
+                'key': bucket_key(execution.latency_ms),
+            })
+
+    @staticmethod
+    def percentiles(start, end, template_id=None, provider=None, model=None, group_by=None):
+        """
+        Merge the sketches for start..end (inclusive dates) matching the
+        filters. Returns one summary (count, min, max, mean, p50/p90/p95/p99),
+        or {group value: summary} when group_by is template, provider or model.
+        """
+        rows = TemplateLatencySketch.objects.filter(date__gte=start, date__lte=end)
+        if template_id is not None:
+            rows = rows.filter(template_id=template_id)
+        if provider:
+            rows = rows.filter(provider=provider)
+        if model:
+            rows = rows.filter(model=model)
+        field = LatencyService.GROUP_FIELDS.get(group_by)
+
+        merged = {}
+        for row in rows.order_by().iterator():
+            group = getattr(row, field) if field else None
+            merged.setdefault(group, LatencySketch()).merge(LatencySketch(
+                row.buckets, row.count, row.sum_ms, row.min_ms, row.max_ms,
+            ))
+        if field is None:
+            return merged.get(None, LatencySketch()).summary()
+        return {group: sketch.summary() for group, sketch in merged.items()}
+
+    @staticmethod
+    def rebuild(start=None):
+        """
+        Recompute sketches from executions on or after `start` (a date; all
+        history if None), replacing those days. Returns the rows written.
+        """
+        rows = TemplateLatencySketch.objects.all()
+        if start is not None:
+            rows = rows.filter(date__gte=start)
+            start = timezone.make_aware(datetime.combine(start, time.min))
+        with transaction.atomic():
+            rows.delete()
+            with connection.cursor() as cursor:
+                cursor.execute(REBUILD_SQL, {
+                    'tz': settings.TIME_ZONE,
+                    'log_gamma': LOG_GAMMA,
+                    'start': start or '-infinity',
+                })
+                return cursor.rowcount
@@ -0,0 +1,153 @@
+"""
+Service for real-time usage counters kept in Redis
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from apps.execution.models import Execution
+from common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'prompt-library:live'
+METRICS = ('count', 'success', 'failure', 'tokens', 'cost_micro_usd')
+
+
+def _minute(dt):
+    return int(dt.timestamp()) // 60
+
+
+def _key(dimension, minute):
+    return f'{KEY_PREFIX}:{dimension}:{minute}'
+
+
+def _increments(user_id, template_id, provider, model, status, total_tokens, cost_usd):
+    """{(dimension, field): amount} for one completed execution."""
+    amounts = {
+        'count': 1,
+        'success': int(status == Execution.STATUS_SUCCESS),
+        'failure': int(status == Execution.STATUS_FAILED),
+        'tokens': total_tokens or 0,
+        'cost_micro_usd': int((cost_usd or 0) * 1_000_000),
+    }
+    dimensions = {'user': user_id, 'template': template_id, 'provider': provider, 'model': model}
+    return {
+        (dimension, f'{value}|{metric}'): amount
+        for dimension, value in dimensions.items() if value is not None
+        for metric, amount in amounts.items() if amount
+    }
+
+
+class LiveMetricsService:
+    """
+    Per-minute counters of completed executions by user, template, provider
+    and model. Each (dimension, minute) is one Redis hash with a
+    "<value>|<metric>" field per counter, so reading N minutes is N hash
+    reads in one pipeline whatever the history size. Hashes expire after
+    LIVE_METRICS_RETENTION minutes.
+
+    Executions are bucketed by executed_at, which lets reconcile() rebuild
+    any closed minute from Postgres: it overwrites the last
+    LIVE_METRICS_RECONCILE_WINDOW minutes, repairing increments lost while
+    Redis was unreachable or counted twice around a reconcile.
+    """
+
+    DIMENSIONS = ('user', 'template', 'provider', 'model')
+
+    @staticmethod
+    def record(execution):
+        if execution.status not in (Execution.STATUS_SUCCESS, Execution.STATUS_FAILED):
+            return
+        minute = _minute(execution.executed_at)
+        increments = _increments(
+            execution.executed_by_id,
+            execution.version.template_id if execution.version_id else None,
+            execution.provider, execution.model, execution.status,
+            execution.total_tokens, execution.estimated_cost_usd,
+        )
+        ttl = settings.LIVE_METRICS_RETENTION * 60
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for (dimension, field), amount in increments.items():
+                pipe.hincrby(_key(dimension, minute), field, amount)
+            for dimension in LiveMetricsService.DIMENSIONS:
+                pipe.expire(_key(dimension, minute), ttl)
+            pipe.execute()
+        except Exception:
+            # reconcile() fills the gap from Postgres
+            logger.warning('Could not record live execution metrics', exc_info=True)
+
+    @staticmethod
+    def read(dimension, minutes, value=None):
+        """
+        Counters for the last `minutes` minutes, the current one included.
+        With a value: {'series': [{minute, metrics}...], 'totals': metrics}.
+        Without: {'totals': {value: metrics}} for every value seen.
+        """
+        now = _minute(datetime.now(dt_timezone.utc))
+        window = range(now - minutes + 1, now + 1)
+        pipe = get_redis().pipeline(transaction=False)
+        if value is not None:
+            fields = [f'{value}|{metric}' for metric in METRICS]
+            for minute in window:
+                pipe.hmget(_key(dimension, minute), fields)
+            series = []
+            totals = dict.fromkeys(METRICS, 0)
+            for minute, counts in zip(window, pipe.execute()):
+                point = {metric: int(n or 0) for metric, n in zip(METRICS, counts)}
+                for metric, n in point.items():
+                    totals[metric] += n
+                series.append({'minute': datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc), **point})
+            return {'series': series, 'totals': totals}
+
+        for minute in window:
+            pipe.hgetall(_key(dimension, minute))
+        totals = {}
+        for counts in pipe.execute():
+            for field, n in counts.items():
+                member, metric = field.decode().rsplit('|', 1)
+                per_value = totals.setdefault(member, dict.fromkeys(METRICS, 0))
+                per_value[metric] += int(n)
+        return {'totals': totals}
+
+    @staticmethod
+    def reconcile():
+        """
+        Rewrite the closed minutes of the reconcile window from Postgres.
+        Returns the number of minutes rewritten.
+        """
+        now = _minute(datetime.now(dt_timezone.utc))
+        first = now - settings.LIVE_METRICS_RECONCILE_WINDOW
+        rows = (
+            Execution.objects
+            .filter(
+                executed_at__gte=datetime.fromtimestamp(first * 60, tz=dt_timezone.utc),
+                executed_at__lt=datetime.fromtimestamp(now * 60, tz=dt_timezone.utc),
+                status__in=(Execution.STATUS_SUCCESS, Execution.STATUS_FAILED),
+            )
+            .order_by()
+            .values_list(
+                'executed_at', 'executed_by_id', 'version__template_id', 'provider', 'model',
+                'status', 'total_tokens', 'estimated_cost_usd',
+            )
+        )
+        hashes = {}
+        for executed_at, *fields in rows.iterator():
+            minute = _minute(executed_at)
+            for (dimension, field), amount in _increments(*fields).items():
+                counters = hashes.setdefault((dimension, minute), {})
+                counters[field] = counters.get(field, 0) + amount
+
+        ttl = settings.LIVE_METRICS_RETENTION * 60
+        # One MULTI so readers never see a minute half rewritten
+        pipe = get_redis().pipeline(transaction=True)
+        for minute in range(first, now):
+            for dimension in LiveMetricsService.DIMENSIONS:
+                key = _key(dimension, minute)
+                pipe.delete(key)
+                counters = hashes.get((dimension, minute))
+                if counters:
+                    pipe.hset(key, mapping=counters)
+                    pipe.expire(key, ttl)
+        pipe.execute()
+        return now - first
@@ -0,0 +1,205 @@
+"""
+Service for maintaining the TemplateAnalytics daily rollups
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+from apps.analytics.models import RollupWatermark
+from apps.execution.models import Execution
+
+EXECUTIONS_WATERMARK = 'template-analytics:executions'
+FEEDBACK_WATERMARK = 'template-analytics:feedback'
+CUBE_WATERMARK = 'usage-cube:executions'
+WATERMARKS = (EXECUTIONS_WATERMARK, FEEDBACK_WATERMARK, CUBE_WATERMARK)
+# Lower bound for the first run, which backfills all history
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+UPSERT_EXECUTIONS_SQL = """
+    INSERT INTO analytics_templateanalytics AS a (
+        template_id, date, execution_count, success_count, failure_count,
+        total_tokens, total_cost_usd, latency_sum_ms, latency_count, avg_latency_ms,
+        rating_sum, rating_count
+    )
+    SELECT v.template_id, (e.executed_at AT TIME ZONE %(tz)s)::date,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE e.status = %(success)s),
+           COUNT(*) FILTER (WHERE e.status = %(failed)s),
+           COALESCE(SUM(e.total_tokens), 0),
+           COALESCE(SUM(e.estimated_cost_usd), 0),
+           COALESCE(SUM(e.latency_ms), 0),
+           COUNT(e.latency_ms),
+           AVG(e.latency_ms),
+           0, 0
+    FROM execution_execution e
+    JOIN prompts_promptversion v ON v.id = e.version_id
+    WHERE e.executed_at >= %(start)s AND e.executed_at < %(end)s
+      AND e.status IN (%(success)s, %(failed)s)
+    GROUP BY 1, 2
+    ON CONFLICT (template_id, date) DO UPDATE SET
+        execution_count = a.execution_count + EXCLUDED.execution_count,
+        success_count = a.success_count + EXCLUDED.success_count,
+        failure_count = a.failure_count + EXCLUDED.failure_count,
+        total_tokens = a.total_tokens + EXCLUDED.total_tokens,
+        total_cost_usd = a.total_cost_usd + EXCLUDED.total_cost_usd,
+        latency_sum_ms = a.latency_sum_ms + EXCLUDED.latency_sum_ms,
+        latency_count = a.latency_count + EXCLUDED.latency_count,
+        avg_latency_ms = (a.latency_sum_ms + EXCLUDED.latency_sum_ms)::float
+                         / NULLIF(a.latency_count + EXCLUDED.latency_count, 0)
+"""
+
+UPSERT_CUBE_SQL = """
+    INSERT INTO analytics_usagecube AS c (
+        hour, user_id, template_id, provider, model, status, execution_count,
+        prompt_tokens, completion_tokens, total_tokens, cost_usd, latency_sum_ms, latency_count
+    )
+    SELECT date_trunc('hour', e.executed_at), e.executed_by_id, v.template_id, e.provider, e.model, e.status,
+           COUNT(*),
+           COALESCE(SUM(e.prompt_tokens), 0),
+           COALESCE(SUM(e.completion_tokens), 0),
+           COALESCE(SUM(e.total_tokens), 0),
+           COALESCE(SUM(e.estimated_cost_usd), 0),
+           COALESCE(SUM(e.latency_ms), 0),
+           COUNT(e.latency_ms)
+    FROM execution_execution e
+    LEFT JOIN prompts_promptversion v ON v.id = e.version_id
+    WHERE e.executed_at >= %(start)s AND e.executed_at < %(end)s
+      AND e.status IN (%(success)s, %(failed)s)
+    GROUP BY 1, 2, 3, 4, 5, 6
+    ON CONFLICT (hour, COALESCE(user_id, 0), COALESCE(template_id, 0), provider, model, status) DO UPDATE SET
+        execution_count = c.execution_count + EXCLUDED.execution_count,
+        prompt_tokens = c.prompt_tokens + EXCLUDED.prompt_tokens,
+        completion_tokens = c.completion_tokens + EXCLUDED.completion_tokens,
+        total_tokens = c.total_tokens + EXCLUDED.total_tokens,
+        cost_usd = c.cost_usd + EXCLUDED.cost_usd,
+        latency_sum_ms = c.latency_sum_ms + EXCLUDED.latency_sum_ms,
+        latency_count = c.latency_count + EXCLUDED.latency_count
+"""
+
+# Ratings are recomputed, not incremented, for every (template, day) whose
+# feedback changed: feedback can be edited or deleted after it was counted.
+REFRESH_RATINGS_SQL = """
+    WITH touched AS ({touched}),
+    ratings AS (
+        SELECT t.template_id, t.day, COALESCE(SUM(f.rating), 0) AS rating_sum, COUNT(f.rating) AS rating_count
+        FROM touched t
+        JOIN prompts_promptversion v ON v.template_id = t.template_id
+        JOIN execution_execution e ON e.version_id = v.id
+             AND e.executed_at >= (t.day::timestamp AT TIME ZONE %(tz)s)
+             AND e.executed_at < ((t.day + 1)::timestamp AT TIME ZONE %(tz)s)
+        LEFT JOIN execution_executionfeedback f ON f.execution_id = e.id
+        GROUP BY 1, 2
+    )
+    UPDATE analytics_templateanalytics a
+    SET rating_sum = r.rating_sum,
+        rating_count = r.rating_count,
+        avg_rating = r.rating_sum::float / NULLIF(r.rating_count, 0)
+    FROM ratings r
+    WHERE a.template_id = r.template_id AND a.date = r.day
+"""
+
+TOUCHED_BY_FEEDBACK_SQL = """
+    SELECT DISTINCT v.template_id, (e.executed_at AT TIME ZONE %(tz)s)::date AS day
+    FROM execution_executionfeedback f
+    JOIN execution_execution e ON e.id = f.execution_id
+    JOIN prompts_promptversion v ON v.id = e.version_id
+    WHERE f.updated_at >= %(start)s AND f.updated_at < %(end)s
+"""
+
+
+class RollupService:
+    """
+    Incremental TemplateAnalytics and UsageCube maintenance. Each run
+    consumes the executions and feedback written since the stored
+    watermarks, up to now - ANALYTICS_ROLLUP_LAG. Only executions with a
+    final status are counted; executed_at is set when an execution starts,
+    so the window also stops at the oldest execution still pending or
+    running and that execution is counted once it finishes. One in flight
+    longer than ANALYTICS_ROLLUP_MAX_IN_FLIGHT is treated as abandoned and
+    no longer holds the window back:
+
+    - executions are grouped per (template, day) and added to the existing
+      row with INSERT ... ON CONFLICT DO UPDATE arithmetic;
+    - executions are also grouped per (hour, user, template, provider,
+      model, status) and added to the usage cube the same way;
+    - feedback created or edited in the window marks its execution's
+      (template, day) for a rating recompute, so feedback arriving days after
+      the execution is still attributed to the execution's day.
+
+    Feedback is only processed up to the same bound as executions; as
+    feedback always follows its execution, the row it updates exists by then.
+    Each target has its own watermark, so the first run for one (including
+    one added later) starts from the beginning and backfills history.
+    """
+
+    @staticmethod
+    def run():
+        """Roll up one window. Returns the window and the rows touched."""
+        now = timezone.now()
+        end = now - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG)
+        in_flight = Execution.objects.filter(
+            status__in=[Execution.STATUS_PENDING, Execution.STATUS_RUNNING],
+            executed_at__gte=now - timedelta(seconds=settings.ANALYTICS_ROLLUP_MAX_IN_FLIGHT),
+            executed_at__lt=end,
+        ).aggregate(oldest=Min('executed_at'))['oldest']
+        if in_flight is not None:
+            end = in_flight
+        with transaction.atomic():
+            for name in WATERMARKS:
+                RollupWatermark.objects.get_or_create(name=name)
+            # Row locks keep concurrent runs from consuming the same window twice
+            marks = {
+                mark.name: mark
+                for mark in RollupWatermark.objects.select_for_update().filter(name__in=WATERMARKS)
+            }
+            starts = {name: mark.position or EPOCH for name, mark in marks.items()}
+            result = {
+                'start': min(starts.values()), 'end': end,
+                'rows_upserted': 0, 'cube_rows_upserted': 0, 'ratings_refreshed': 0,
+            }
+            if end <= result['start']:
+                return result
+
+            with connection.cursor() as cursor:
+                if starts[EXECUTIONS_WATERMARK] < end:
+                    cursor.execute(UPSERT_EXECUTIONS_SQL, {
+                        'tz': settings.TIME_ZONE,
+                        'success': Execution.STATUS_SUCCESS,
+                        'failed': Execution.STATUS_FAILED,
+                        'start': starts[EXECUTIONS_WATERMARK],
+                        'end': end,
+                    })
+                    result['rows_upserted'] = cursor.rowcount
+                if starts[CUBE_WATERMARK] < end:
+                    cursor.execute(UPSERT_CUBE_SQL, {
+                        'success': Execution.STATUS_SUCCESS,
+                        'failed': Execution.STATUS_FAILED,
+                        'start': starts[CUBE_WATERMARK],
+                        'end': end,
+                    })
+                    result['cube_rows_upserted'] = cursor.rowcount
+            if starts[FEEDBACK_WATERMARK] < end:
+                result['ratings_refreshed'] = RollupService._refresh_ratings(
+                    TOUCHED_BY_FEEDBACK_SQL, {'start': starts[FEEDBACK_WATERMARK], 'end': end},
+                )
+
+            for mark in marks.values():
+                if starts[mark.name] < end:
+                    mark.position = end
+                    mark.save(update_fields=['position', 'updated_at'])
+        return result
+
+    @staticmethod
+    def refresh_ratings(template_id, day):
+        """Recompute one (template, day)'s rating columns, e.g. after feedback is deleted."""
+        return RollupService._refresh_ratings(
+            'SELECT %(template_id)s::bigint AS template_id, %(day)s::date AS day',
+            {'template_id': template_id, 'day': day},
+        )
+
+    @staticmethod
+    def _refresh_ratings(touched_sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_RATINGS_SQL.format(touched=touched_sql), {'tz': settings.TIME_ZONE, **params})
+            return cursor.rowcount
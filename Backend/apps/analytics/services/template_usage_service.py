@@ -0,0 +1,93 @@
+"""
+Service for the usage counters denormalized onto PromptTemplate
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from apps.execution.models import Execution
+from apps.prompts.models import PromptTemplate
+from common.cache import bump_version, bump_versions_many
+
+# Set when counters changed since the template-usage namespace was last bumped
+DIRTY_KEY = 'template-usage:dirty'
+
+# Recompute every template's counters from its executions, writing only the
+# rows that changed
+REBUILD_SQL = """
+    UPDATE prompts_prompttemplate t
+    SET execution_count = COALESCE(s.executions, 0),
+        success_count = COALESCE(s.successes, 0),
+        last_executed_at = s.last_executed_at,
+        total_cost = COALESCE(s.cost, 0)
+    FROM prompts_prompttemplate c
+    LEFT JOIN (
+        SELECT v.template_id,
+               COUNT(*) AS executions,
+               COUNT(*) FILTER (WHERE e.status = %(success)s) AS successes,
+               MAX(e.executed_at) AS last_executed_at,
+               SUM(e.estimated_cost_usd) AS cost
+        FROM execution_execution e
+        JOIN prompts_promptversion v ON v.id = e.version_id
+        WHERE e.status IN (%(success)s, %(failed)s)
+        GROUP BY v.template_id
+    ) s ON s.template_id = c.id
+    WHERE t.id = c.id
+      AND (t.execution_count, t.success_count, t.last_executed_at, t.total_cost)
+          IS DISTINCT FROM
+          (COALESCE(s.executions, 0), COALESCE(s.successes, 0), s.last_executed_at, COALESCE(s.cost, 0))
+    RETURNING t.id
+"""
+
+
+class TemplateUsageService:
+    """
+    Keeps PromptTemplate.execution_count, success_count, last_executed_at
+    and total_cost current: each completed execution adds to its template's
+    row in one atomic UPDATE with F() expressions, so concurrent executions
+    never lose increments and no read is needed. Indexes on these columns
+    make the "most used", "recently used" and "most expensive" template list
+    orderings index scans instead of aggregates over executions.
+
+    Deleted executions are not subtracted; rebuild() recomputes everything.
+    """
+
+    @staticmethod
+    def record(execution):
+        if execution.version_id is None:
+            return
+        template_id = execution.version.template_id
+        succeeded = execution.status == Execution.STATUS_SUCCESS
+        PromptTemplate.objects.filter(pk=template_id).update(
+            execution_count=F('execution_count') + 1,
+            success_count=F('success_count') + int(succeeded),
+            total_cost=F('total_cost') + (execution.estimated_cost_usd or 0),
+            # GREATEST skips NULL, so the first execution sets it
+            last_executed_at=Greatest('last_executed_at', Value(execution.executed_at)),
+        )
+        # The template's own responses carry the counters. The template-usage
+        # namespace keys every user's list cache and ETag, so it is only
+        # marked here and bumped at most once a minute by flush_version()
+        bump_version(f'template:{template_id}')
+        cache.set(DIRTY_KEY, True, None)
+
+    @staticmethod
+    def flush_version():
+        """Bump the template-usage namespace if any counter changed since the last call."""
+        if cache.delete(DIRTY_KEY):
+            bump_version('template-usage')
+            return True
+        return False
+
+    @staticmethod
+    def rebuild():
+        """Recompute all counters from executions. Returns the number of templates changed."""
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_SQL, {
+                'success': Execution.STATUS_SUCCESS,
+                'failed': Execution.STATUS_FAILED,
+            })
+            changed = [row[0] for row in cursor.fetchall()]
+        bump_versions_many([f'template:{pk}' for pk in changed])
+        bump_version('template-usage')
+        return len(changed)
@@ -0,0 +1,128 @@
+"""
+Service for downsampled usage time series
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from apps.analytics import downsample
+from apps.analytics.services.usage_cube_service import UsageCubeService
+
+# Grains from finest to coarsest, with the longest period of each
+GRAIN_LENGTHS = (
+    ('hour', timedelta(hours=1)), ('day', timedelta(days=1)), ('week', timedelta(weeks=1)),
+    ('month', timedelta(days=31)), ('quarter', timedelta(days=92)), ('year', timedelta(days=366)),
+)
+
+
+class TimeSeriesService:
+    """
+    Chart-ready series from the hourly usage cube. Periods are aggregated in
+    the database at the requested grain (by default the finest one that
+    keeps the range under TIMESERIES_MAX_PERIODS), empty periods are filled
+    with zeros, and each metric is then downsampled to at most `points`
+    points, so the payload depends on `points`, the metrics and the number
+    of series, never on the length of the range.
+    """
+
+    @staticmethod
+    def series(start, end, metrics=('execution_count',), grain=None, points=200, mode='lttb',
+               group_by=None, limit=10, user=None, template_id=None, provider=None, model=None):
+        """
+        One series per group (the `limit` groups with the most executions),
+        or a single series without group_by. start and end are dates, end
+        inclusive. Raises ValueError when an explicit grain has more than
+        TIMESERIES_MAX_PERIODS periods in the range.
+        """
+        days = (end - start).days + 1
+        for grain in [grain] if grain else [name for name, _ in GRAIN_LENGTHS]:
+            # Cheap estimate first, so long ranges never enumerate their hours
+            if days * 86400 / dict(GRAIN_LENGTHS)[grain].total_seconds() <= settings.TIMESERIES_MAX_PERIODS:
+                periods = _periods(start, end, grain)
+                if len(periods) <= settings.TIMESERIES_MAX_PERIODS:
+                    break
+        else:
+            raise ValueError(f'Too many {grain} periods in range; at most {settings.TIMESERIES_MAX_PERIODS}.')
+
+        filters = {
+            'start': _start_of(start), 'end': _start_of(end + timedelta(days=1)),
+            'user': user, 'template_id': template_id, 'provider': provider, 'model': model,
+        }
+        groups = [None]
+        if group_by:
+            top = UsageCubeService.query(group_by=[group_by], order_by='execution_count', limit=limit, **filters)
+            groups = [row[group_by] for row in top]
+            if not groups:
+                return {'grain': grain, 'series': []}
+        rows = UsageCubeService.query(
+            grain=grain, group_by=[group_by] if group_by else [],
+            only={group_by: groups} if group_by else None, **filters,
+        )
+        by_group = {}
+        for row in rows:
+            by_group.setdefault(row[group_by] if group_by else None, {})[row['period']] = row
+
+        x = [period.timestamp() for period in periods]
+        series = []
+        for group in groups:
+            cells = by_group.get(group, {})
+            values = {metric: [] for metric in metrics}
+            for period in periods:
+                row = cells.get(period)
+                for metric in metrics:
+                    values[metric].append(_metric(row, metric))
+            data = {}
+            for metric in metrics:
+                present = [i for i, value in enumerate(values[metric]) if value is not None]
+                kept = downsample.downsample(
+                    [x[i] for i in present], [values[metric][i] for i in present], points, mode,
+                )
+                data[metric] = [
+                    [timezone.localtime(periods[present[i]]).isoformat(), values[metric][present[i]]]
+                    for i in kept
+                ]
+            item = {group_by: group} if group_by else {}
+            item['execution_count'] = sum(row['execution_count'] for row in cells.values())
+            item['data'] = data
+            series.append(item)
+        return {'grain': grain, 'series': series}
+
+
+def _metric(row, metric):
+    if row is None:
+        return None if metric in ('avg_latency_ms', 'success_rate') else 0
+    if metric == 'success_rate':
+        executions = row['execution_count']
+        return round(row['success_count'] / executions * 100, 2) if executions else None
+    return row[metric]
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _periods(start, end, grain):
+    """Start of every `grain` period overlapping start..end, as the cube's Trunc would return it."""
+    if grain == 'hour':
+        # Step in UTC: aware arithmetic in the local zone is wall-clock and drifts over DST changes
+        first = _start_of(start).astimezone(dt_timezone.utc)
+        stop = _start_of(end + timedelta(days=1))
+        count = int((stop - first).total_seconds() // 3600)
+        return [first + timedelta(hours=i) for i in range(count)]
+
+    def floor(day):
+        if grain == 'week':
+            return day - timedelta(days=day.weekday())
+        if grain == 'month':
+            return day.replace(day=1)
+        if grain == 'quarter':
+            return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+        if grain == 'year':
+            return date(day.year, 1, 1)
+        return day
+
+    periods = []
+    day = floor(start)
+    while day <= end:
+        periods.append(_start_of(day))
+        day = floor(day + dict(GRAIN_LENGTHS)[grain])
+    return periods
@@ -0,0 +1,97 @@
+"""
+Service for querying the hourly usage cube
+"""
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+from apps.analytics.models import UsageCube
+from apps.execution.models import Execution
+
+
+class UsageCubeService:
+    """
+    Rolls UsageCube cells up to any coarser grain: a time grain (hour, day,
+    week, month, quarter, year, or none for the whole range) and any subset
+    of the cube's dimensions. Each query is one GROUP BY over at most one
+    row per hour and cell, independent of how many executions there were.
+    """
+
+    GRAINS = {
+        'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek,
+        'month': TruncMonth, 'quarter': TruncQuarter, 'year': TruncYear,
+    }
+    DIMENSIONS = ('user', 'template', 'provider', 'model', 'status')
+    ORDER_ALIASES = {'execution_count': 'executions', 'total_tokens': 'token_sum', 'cost_usd': 'cost_sum'}
+    ORDERINGS = ('period', *ORDER_ALIASES)
+
+    @staticmethod
+    def query(start=None, end=None, grain=None, group_by=(), user=None, template_id=None,
+              provider=None, model=None, only=None, order_by=None, limit=None):
+        """
+        Totals per (period, *group_by) for cells with start <= hour < end.
+        Each row has period (with a grain), the group_by values, and
+        execution_count, success_count, failure_count, prompt_tokens,
+        completion_tokens, total_tokens, cost_usd and avg_latency_ms.
+        `only` maps dimensions to the values to keep, e.g. {'template': [1, 2]}.
+        `order_by` is one of ORDERINGS (descending except period). Without a
+        grain or group_by the result is a single row of range totals.
+        Raises ValueError when `limit` is given and below 1.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be at least 1.')
+        cells = UsageCube.objects.order_by()
+        if start is not None:
+            cells = cells.filter(hour__gte=start)
+        if end is not None:
+            cells = cells.filter(hour__lt=end)
+        if user is not None:
+            cells = cells.filter(user=user)
+        if template_id is not None:
+            cells = cells.filter(template_id=template_id)
+        if provider:
+            cells = cells.filter(provider=provider)
+        if model:
+            cells = cells.filter(model=model)
+        for dimension, values in (only or {}).items():
+            cells = cells.filter(**{f'{dimension}__in': values})
+
+        period = {'period': UsageCubeService.GRAINS[grain]('hour')} if grain else {}
+        # Aliases differ from the cube's column names, which Django would resolve them to
+        totals = {
+            'executions': Sum('execution_count', default=0),
+            'successes': Sum('execution_count', filter=Q(status=Execution.STATUS_SUCCESS), default=0),
+            'failures': Sum('execution_count', filter=Q(status=Execution.STATUS_FAILED), default=0),
+            'prompt_token_sum': Sum('prompt_tokens', default=0),
+            'completion_token_sum': Sum('completion_tokens', default=0),
+            'token_sum': Sum('total_tokens', default=0),
+            'cost_sum': Sum('cost_usd', default=0),
+            'latency_sum': Sum('latency_sum_ms', default=0),
+            'latency_samples': Sum('latency_count', default=0),
+        }
+        if not period and not group_by:
+            # Nothing to group by: one row for the whole range (values() alone would group by id)
+            rows = [cells.aggregate(**totals)]
+        else:
+            rows = cells.values(*group_by, **period).annotate(**totals)
+            if order_by and order_by != 'period':
+                rows = rows.order_by(f'-{UsageCubeService.ORDER_ALIASES[order_by]}')
+            elif grain:
+                rows = rows.order_by('period')
+            if limit is not None:
+                rows = rows[:limit]
+
+        return [
+            {
+                **{key: row[key] for key in (*period, *group_by)},
+                'execution_count': row['executions'],
+                'success_count': row['successes'],
+                'failure_count': row['failures'],
+                'prompt_tokens': row['prompt_token_sum'],
+                'completion_tokens': row['completion_token_sum'],
+                'total_tokens': row['token_sum'],
+                'cost_usd': float(row['cost_sum']),
+                'avg_latency_ms': (
+                    round(row['latency_sum'] / row['latency_samples'], 2) if row['latency_samples'] else None
+                ),
+            }
+            for row in rows
+        ]
@@ -0,0 +1,197 @@
+"""
+Service for comparing the A/B variants of a prompt version
+"""
+import io
+import struct
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from apps.analytics import stats
+from apps.execution.models import Execution, ExecutionFeedback
+from apps.prompts.models import PromptVariant
+
+# Every column is NOT NULL after COALESCE, so each binary COPY row has the
+# same size and the whole result maps onto one structured array.
+COLUMNS_SQL = """
+    COPY (
+        SELECT COALESCE(e.variant_id, 0)::int8,
+               CASE e.status WHEN %(success)s THEN 1 WHEN %(failed)s THEN 2 ELSE 0 END::int4,
+               COALESCE(e.latency_ms::float8, 'NaN'),
+               COALESCE(e.total_tokens::float8, 'NaN'),
+               COALESCE(e.estimated_cost_usd::float8, 'NaN'),
+               COALESCE(f.score, 0)::int4,
+               COALESCE(f.rating::float8, 'NaN')
+        FROM execution_execution e
+        LEFT JOIN execution_executionfeedback f ON f.execution_id = e.id
+        WHERE e.version_id = %(version_id)s
+    ) TO STDOUT WITH (FORMAT binary)
+"""
+ROW_DTYPE = np.dtype([
+    ('fields', '>i2'),
+    ('_0', '>i4'), ('variant', '>i8'),
+    ('_1', '>i4'), ('status', '>i4'),
+    ('_2', '>i4'), ('latency', '>f8'),
+    ('_3', '>i4'), ('tokens', '>f8'),
+    ('_4', '>i4'), ('cost', '>f8'),
+    ('_5', '>i4'), ('score', '>i4'),
+    ('_6', '>i4'), ('rating', '>f8'),
+])
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+CONTROL = 0  # executions of the version without a variant
+
+
+class VariantStatsService:
+    """
+    Loads the per-execution columns for one version (variant, status,
+    latency, tokens, cost, feedback score and rating) in a single binary
+    COPY, parses them with np.frombuffer, and computes every group's
+    statistics with the vectorized helpers in apps/analytics/stats.py.
+    Executions without a variant form the control group.
+    """
+
+    @staticmethod
+    def compare(version, baseline=None):
+        """
+        Per-group summaries with 95% intervals, and tests of each group
+        against `baseline` (a variant id; default the control group when it
+        has executions, otherwise the first variant). Cached for
+        VARIANT_STATS_CACHE_TTL seconds.
+        """
+        cache_key = f'variant-stats:{version.pk}:{baseline}'
+        result = cache.get(cache_key)
+        if result is None:
+            result = VariantStatsService._compare(version, baseline)
+            cache.set(cache_key, result, settings.VARIANT_STATS_CACHE_TTL)
+        return result
+
+    @staticmethod
+    def load_columns(version_id):
+        """Structured array with one row per execution of the version."""
+        buffer = io.BytesIO()
+        with connection.cursor() as cursor:
+            raw = cursor.cursor  # COPY needs the psycopg2 cursor
+            sql = raw.mogrify(COLUMNS_SQL, {
+                'success': Execution.STATUS_SUCCESS,
+                'failed': Execution.STATUS_FAILED,
+                'version_id': int(version_id),
+            })
+            raw.copy_expert(sql.decode(), buffer)
+        data = buffer.getbuffer()
+        if len(data) < len(COPY_SIGNATURE) + 10 or bytes(data[:len(COPY_SIGNATURE)]) != COPY_SIGNATURE:
+            raise ValueError('Unexpected COPY output')
+        extension_length, = struct.unpack_from('>i', data, len(COPY_SIGNATURE) + 4)
+        start = len(COPY_SIGNATURE) + 8 + extension_length
+        return np.frombuffer(data[start:len(data) - 2], dtype=ROW_DTYPE)  # trailer: int16 -1
+
+    @staticmethod
+    def _compare(version, baseline):
+        rows = VariantStatsService.load_columns(version.pk)
+        variants = list(PromptVariant.objects.filter(version=version).order_by('id').values_list('id', 'name'))
+        labels = [(CONTROL, 'Control')] + variants
+        ids = np.array([pk for pk, _ in labels], dtype=np.int64)
+        k = len(ids)
+
+        # Executions whose variant was deleted fall back to the control group
+        variant_ids = rows['variant'].astype(np.int64)
+        positions = np.searchsorted(ids[1:], variant_ids) + 1
+        positions = np.minimum(positions, k - 1)
+        groups = np.where(ids[positions] == variant_ids, positions, 0)
+
+        status = rows['status'].astype(np.int8)
+        score = rows['score'].astype(np.int8)
+        latency = rows['latency'].astype(float)
+        tokens = rows['tokens'].astype(float)
+        cost = rows['cost'].astype(float)
+        rating = rows['rating'].astype(float)
+
+        executions = stats.group_counts(groups, k)
+        finished = stats.group_counts(groups, k, status != 0)
+        successes = stats.group_counts(groups, k, status == 1)
+        voted = stats.group_counts(groups, k, score != 0)
+        thumbs_up = stats.group_counts(groups, k, score == ExecutionFeedback.SCORE_THUMBS_UP)
+        moments = {
+            'latency_ms': stats.group_moments(latency, groups, k),
+            'tokens': stats.group_moments(tokens, groups, k),
+            'cost_usd': stats.group_moments(cost, groups, k),
+            'rating': stats.group_moments(rating, groups, k),
+        }
+        latency_percentiles = stats.group_percentiles(latency, groups, k, (0.5, 0.95))
+        success_ci = stats.wilson_interval(successes, finished)
+        thumbs_ci = stats.wilson_interval(thumbs_up, voted)
+        mean_cis = {metric: stats.mean_interval(*m) for metric, m in moments.items()}
+
+        if baseline is None:
+            base = 0 if executions[0] else (1 if k > 1 else 0)
+        else:
+            matches = np.flatnonzero(ids == int(baseline))
+            if not matches.size or matches[0] == 0:
+                raise ValueError(f'Variant {baseline} does not belong to this version.')
+            base = int(matches[0])
+
+        groups_out = []
+        for i, (pk, name) in enumerate(labels):
+            group = {
+                'variant': pk or None,
+                'name': name,
+                'executions': int(executions[i]),
+                'success_rate': _proportion(successes[i], finished[i], success_ci, i),
+                'thumbs_up_rate': _proportion(thumbs_up[i], voted[i], thumbs_ci, i),
+            }
+            for metric, (n, mean, _) in moments.items():
+                group[metric] = {
+                    'n': int(n[i]),
+                    'mean': _number(mean[i]),
+                    'ci': [_number(mean_cis[metric][0][i]), _number(mean_cis[metric][1][i])],
+                }
+            group['latency_ms']['p50'] = _number(latency_percentiles[0.5][i])
+            group['latency_ms']['p95'] = _number(latency_percentiles[0.95][i])
+            cost_n, cost_mean, _ = moments['cost_usd']
+            group['cost_usd']['total'] = _number(cost_n[i] * cost_mean[i]) if cost_n[i] else 0.0
+
+            if i != base:
+                tests = {
+                    'success_rate': _z_test(stats.two_proportion_z_test(
+                        int(successes[i]), int(finished[i]), int(successes[base]), int(finished[base]))),
+                    'thumbs_up_rate': _z_test(stats.two_proportion_z_test(
+                        int(thumbs_up[i]), int(voted[i]), int(thumbs_up[base]), int(voted[base]))),
+                }
+                for metric, (n, mean, variance) in moments.items():
+                    tests[metric] = _t_test(stats.welch_t_test(
+                        n[i], mean[i], variance[i], n[base], mean[base], variance[base]))
+                group['vs_baseline'] = tests
+            groups_out.append(group)
+
+        return {
+            'version': version.pk,
+            'baseline': labels[base][0] or None,
+            'confidence': 0.95,
+            'groups': groups_out,
+        }
+
+
+def _number(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 6)
+
+
+def _proportion(hits, n, interval, i):
+    return {
+        'n': int(n),
+        'rate': _number(hits / n) if n else None,
+        'ci': [_number(interval[0][i]), _number(interval[1][i])],
+    }
+
+
+def _z_test(result):
+    if result is None:
+        return None
+    difference, z, p = result
+    return {'difference': _number(difference), 'z': _number(z), 'p_value': _number(p)}
+
+
+def _t_test(result):
+    if result is None:
+        return None
+    difference, t, df, p = result
+    return {'difference': _number(difference), 't': _number(t), 'df': _number(df), 'p_value': _number(p)}
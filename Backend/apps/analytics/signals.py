@@ -0,0 +1,52 @@
+"""
+Signal handlers feeding latency sketches, distinct-count sketches, live counters and
+template usage counters, and keeping TemplateAnalytics
+rollups in sync with changes the incremental rollup cannot see
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.execution.models import Execution, ExecutionFeedback
+from apps.execution.signals import execution_completed
+from .services.distinct_counts_service import DistinctCountsService
+from .services.latency_service import LatencyService
+from .services.live_metrics_service import LiveMetricsService
+from .services.rollup_service import RollupService
+from .services.template_usage_service import TemplateUsageService
+
+
+@receiver(execution_completed)
+def record_execution_latency(sender, execution, **kwargs):
+    LatencyService.record(execution)
+
+
+@receiver(execution_completed)
+def record_distinct_counts(sender, execution, **kwargs):
+    DistinctCountsService.record(execution)
+
+
+@receiver(execution_completed)
+def record_live_metrics(sender, execution, **kwargs):
+    LiveMetricsService.record(execution)
+
+
+@receiver(execution_completed)
+def record_template_usage(sender, execution, **kwargs):
+    TemplateUsageService.record(execution)
+
+
+@receiver(post_delete, sender=ExecutionFeedback)
+def refresh_ratings_after_feedback_delete(sender, instance, **kwargs):
+    # Deleted feedback leaves no updated_at behind for the rollup to pick up
+    execution = (
+        Execution.objects
+        .filter(pk=instance.execution_id, version__isnull=False)
+        .values('executed_at', 'version__template_id')
+        .first()
+    )
+    if execution is None:  # deleted along with its execution
+        return
+    template_id = execution['version__template_id']
+    day = timezone.localtime(execution['executed_at']).date()
+    transaction.on_commit(lambda: RollupService.refresh_ratings(template_id, day))
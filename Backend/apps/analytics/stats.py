@@ -0,0 +1,139 @@
+"""
+Vectorized summary statistics and significance tests for A/B comparisons.
+
+Inputs are flat NumPy arrays with one element per execution plus a group
+index per element; per-group sums come from np.bincount, so the cost is a
+few passes over the arrays whatever the number of rows or groups. Missing
+values are NaN and are left out of the metric they belong to.
+
+Intervals are 95% (normal approximation, Wilson for proportions); p-values
+are two-sided and not adjusted for multiple comparisons.
+"""
+import math
+import numpy as np
+
+Z_95 = 1.959963984540054
+
+
+def group_counts(groups, k, mask=None):
+    if mask is not None:
+        groups = groups[mask]
+    return np.bincount(groups, minlength=k)
+
+
+def group_moments(values, groups, k):
+    """(n, mean, sample variance) per group over the non-NaN values."""
+    present = ~np.isnan(values)
+    g = groups[present]
+    x = values[present]
+    n = np.bincount(g, minlength=k).astype(float)
+    total = np.bincount(g, weights=x, minlength=k)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        # Two-pass variance: squares of deviations from each group's mean
+        deviation = x - mean[g]
+        variance = np.bincount(g, weights=deviation * deviation, minlength=k) / (n - 1)
+    return n, mean, variance
+
+
+def group_percentiles(values, groups, k, quantiles):
+    """{q: array of per-group q-quantiles} using one sort of (group, value)."""
+    present = ~np.isnan(values)
+    g = groups[present]
+    x = values[present]
+    order = np.lexsort((x, g))
+    x, g = x[order], g[order]
+    bounds = np.searchsorted(g, np.arange(k + 1))
+    result = {q: np.full(k, np.nan) for q in quantiles}
+    for i in range(k):
+        chunk = x[bounds[i]:bounds[i + 1]]
+        if chunk.size:
+            for q in quantiles:
+                result[q][i] = np.quantile(chunk, q)
+    return result
+
+
+def wilson_interval(successes, n):
+    """95% Wilson score intervals, element-wise; NaN where n == 0."""
+    successes = np.asarray(successes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = successes / n
+        denominator = 1 + Z_95 ** 2 / n
+        centre = (p + Z_95 ** 2 / (2 * n)) / denominator
+        half = Z_95 * np.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n * n)) / denominator
+    return centre - half, centre + half
+
+
+def mean_interval(n, mean, variance):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        half = Z_95 * np.sqrt(variance / n)
+    return mean - half, mean + half
+
+
+def normal_sf(z):
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def two_proportion_z_test(x1, n1, x2, n2):
+    """(difference p1 - p2, z, two-sided p) with the pooled standard error."""
+    if not n1 or not n2:
+        return None
+    p1, p2 = x1 / n1, x2 / n2
+    pooled = (x1 + x2) / (n1 + n2)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return p1 - p2, 0.0, 1.0
+    z = (p1 - p2) / se
+    return p1 - p2, z, 2 * normal_sf(abs(z))
+
+
+def welch_t_test(n1, mean1, var1, n2, mean2, var2):
+    """(difference mean1 - mean2, t, Welch-Satterthwaite df, two-sided p)."""
+    if n1 < 2 or n2 < 2:
+        return None
+    a, b = var1 / n1, var2 / n2
+    se = math.sqrt(a + b)
+    if se == 0:
+        return mean1 - mean2, 0.0, n1 + n2 - 2, 1.0
+    t = (mean1 - mean2) / se
+    df = (a + b) ** 2 / (a * a / (n1 - 1) + b * b / (n2 - 1))
+    return mean1 - mean2, t, df, 2 * student_t_sf(abs(t), df)
+
+
+def student_t_sf(t, df):
+    """P(T > t) for Student's t with `df` degrees of freedom, t >= 0."""
+    if df > 1e6:
+        return normal_sf(t)
+    return 0.5 * _betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def _betainc(a, b, x):
+    """Regularized incomplete beta I_x(a, b) by Lentz's continued fraction."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _betainc(b, a, 1 - x)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    f = d
+    for m in range(1, 300):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            f *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return math.exp(log_front) * f / a
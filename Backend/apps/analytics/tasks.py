@@ -0,0 +1,48 @@
+"""
+Celery tasks for analytics
+"""
+from celery import shared_task
+from apps.analytics.services.distinct_counts_service import DistinctCountsService
+from apps.analytics.services.live_metrics_service import LiveMetricsService
+from apps.analytics.services.rollup_service import RollupService
+from apps.analytics.services.template_usage_service import TemplateUsageService
+
+
+@shared_task
+def rollup_template_analytics():
+    """
+    Fold executions and feedback since the last run into TemplateAnalytics
+    and the usage cube
+    """
+    result = RollupService.run()
+    return {
+        'start': result['start'].isoformat(),
+        'end': result['end'].isoformat(),
+        'rows_upserted': result['rows_upserted'],
+        'cube_rows_upserted': result['cube_rows_upserted'],
+        'ratings_refreshed': result['ratings_refreshed'],
+    }
+
+
+@shared_task
+def reconcile_live_metrics():
+    """
+    Rebuild the recent live counter minutes from Postgres
+    """
+    return LiveMetricsService.reconcile()
+
+
+@shared_task
+def persist_distinct_counts():
+    """
+    Copy the distinct-count sketches of today and yesterday from Redis to Postgres
+    """
+    return DistinctCountsService.persist()
+
+
+@shared_task
+def flush_template_usage_version():
+    """
+    Invalidate template list caches once for all executions recorded since the last run
+    """
+    return TemplateUsageService.flush_version()
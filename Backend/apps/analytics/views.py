@@ -5,12 +5,52 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from datetime import datetime, timedelta
-from django.db.models import Sum, Avg
+from datetime import datetime, time, timedelta
+from django.conf import settings as django_settings
+from django.shortcuts import get_object_or_404
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
+from .downsample import MODES as DOWNSAMPLING_MODES
 from .models import TemplateAnalytics
+from apps.prompts.models import PromptVersion
 from .serializers import TemplateAnalyticsSerializer
-from apps.execution.models import Execution
+from .services.analytics_service import AnalyticsService
+from .services.distinct_counts_service import DistinctCountsService
+from .services.latency_service import LatencyService
+from .services.live_metrics_service import LiveMetricsService
+from .services.timeseries_service import TimeSeriesService
+from .services.usage_cube_service import UsageCubeService
+from .services.variant_stats_service import VariantStatsService
+from apps.execution.services.stats_service import ExecutionStatsService
+from common.params import parse_id
+
+
+
+def _date_range(params, default_days=30):
+    """(start, end) dates from start/end (end inclusive) or the last `days`; None when invalid."""
+    try:
+        end = parse_date(params['end']) if params.get('end') else timezone.localdate()
+        if end is None:
+            return None
+        start = parse_date(params['start']) if params.get('start') else end - timedelta(days=int(params.get('days', default_days)))
+    except (ValueError, OverflowError):
+        return None
+    if start is None or start > end:
+        return None
+    return start, end
+
+
+
+def _days(params, default=30):
+    """The `days` parameter, a non-negative int that can be subtracted from now; None when invalid."""
+    try:
+        days = int(params.get('days', default))
+        timezone.now() - timedelta(days=days)
+    except (ValueError, OverflowError):
+        return None
+    return days if days >= 0 else None
 
 
 class AnalyticsViewSet(viewsets.ViewSet):
@@ -24,33 +64,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         """
         Get dashboard metrics for the current user
         """
-        executions = Execution.objects.filter(executed_by=request.user)
-        
-        total_executions = executions.count()
-        successful = executions.filter(status=Execution.STATUS_SUCCESS).count()
-        failed = executions.filter(status=Execution.STATUS_FAILED).count()
-        
-        total_cost = executions.aggregate(Sum('estimated_cost_usd'))['estimated_cost_usd__sum'] or 0
-        total_tokens = executions.aggregate(Sum('total_tokens'))['total_tokens__sum'] or 0
-        avg_latency = executions.aggregate(Avg('latency_ms'))['latency_ms__avg'] or 0
-        
-        # Provider breakdown
-        from django.db.models import Count
-        provider_breakdown = {}
-        provider_stats = executions.values('provider').annotate(count=Count('id'))
-        for stat in provider_stats:
-            provider_breakdown[stat['provider']] = stat['count']
-        
-        metrics = { 
-            'total_executions': total_executions,
-            'successful_executions': successful,
-            'failed_executions': failed,
-            'success_rate': round((successful / total_executions * 100) if total_executions > 0 else 0, 2),
-            'total_cost': float(total_cost),
-            'total_tokens': total_tokens,
-            'avg_duration_ms': round(avg_latency, 2),
-            'provider_breakdown': provider_breakdown
-        }
+        metrics = ExecutionStatsService.user_summary(request.user)
         return Response(metrics)
 
     @action(detail=False, methods=['get'])
@@ -59,8 +73,309 @@ class AnalyticsViewSet(viewsets.ViewSet):
         Get analytics for all templates
         """
         days = int(request.query_params.get('days', 30))
-        start_date = datetime.now().date() - timedelta(days=days)
+        start_date = timezone.localdate() - timedelta(days=days)
         
-        analytics = TemplateAnalytics.objects.filter(date__gte=start_date).order_by('-date')
+        analytics = (
+            TemplateAnalytics.objects
+            .filter(date__gte=start_date)
+            .select_related('template')
+            .order_by('-date')
+        )
         serializer = TemplateAnalyticsSerializer(analytics, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path=r'templates/(?P<template_id>\d+)')
+    def template_summary(self, request, template_id=None):
+        """
+        Totals and daily rows for one template over the last `days`, read from
+        the rollups (which trail live data by up to ANALYTICS_ROLLUP_LAG plus
+        the rollup interval)
+        """
+        template_id = parse_id(template_id)
+        if template_id is None:
+            return Response({'error': 'template must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+        days = _days(request.query_params)
+        if days is None:
+            return Response({'error': 'days must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        start_date = timezone.localdate() - timedelta(days=days)
+
+        analytics = TemplateAnalytics.objects.filter(template_id=template_id, date__gte=start_date)
+        totals = analytics.aggregate(
+            execution_count=Sum('execution_count'),
+            success_count=Sum('success_count'),
+            failure_count=Sum('failure_count'),
+            total_tokens=Sum('total_tokens'),
+            total_cost_usd=Sum('total_cost_usd'),
+            latency_sum_ms=Sum('latency_sum_ms'),
+            latency_count=Sum('latency_count'),
+            rating_sum=Sum('rating_sum'),
+            rating_count=Sum('rating_count'),
+        )
+        totals = {key: value or 0 for key, value in totals.items()}
+        executions = totals['execution_count']
+        latency_count = totals.pop('latency_count')
+        latency_sum = totals.pop('latency_sum_ms')
+        rating_count = totals.pop('rating_count')
+        rating_sum = totals.pop('rating_sum')
+        return Response({
+            'template': template_id,
+            'days': days,
+            **totals,
+            'total_cost_usd': float(totals['total_cost_usd']),
+            'success_rate': round((totals['success_count'] / executions * 100) if executions else 0, 2),
+            'avg_latency_ms': round(latency_sum / latency_count, 2) if latency_count else None,
+            'avg_rating': round(rating_sum / rating_count, 2) if rating_count else None,
+            'daily': TemplateAnalyticsSerializer(analytics.select_related('template').order_by('date'), many=True).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def latency(self, request):
+        """
+        Latency percentiles (p50/p90/p95/p99) merged from the daily sketches.
+        Range: start/end dates (inclusive), or the last `days` (default 30).
+        Filters: template, provider, model; group_by: template|provider|model.
+        """
+        params = request.query_params
+        date_range = _date_range(params)
+        if date_range is None:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = date_range
+        group_by = params.get('group_by')
+        if group_by and group_by not in LatencyService.GROUP_FIELDS:
+            return Response(
+                {'error': f'group_by must be one of: {list(LatencyService.GROUP_FIELDS)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        template_id = parse_id(params.get('template'))
+        if params.get('template') is not None and template_id is None:
+            return Response({'error': 'template must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = LatencyService.percentiles(
+            start, end,
+            template_id=template_id,
+            provider=params.get('provider'),
+            model=params.get('model'),
+            group_by=group_by,
+        )
+        return Response({
+            'start': start,
+            'end': end,
+            'group_by': group_by,
+            ('groups' if group_by else 'latency'): result,
+        })
+
+    @action(detail=False, methods=['get'])
+    def distinct(self, request):
+        """
+        Approximate distinct users and distinct inputs (HyperLogLog, ~0.8%
+        error) for one template or all. Range: start/end dates (inclusive), or
+        the last `days` (default 30). per_day=true adds a daily breakdown.
+        """
+        params = request.query_params
+        date_range = _date_range(params)
+        if date_range is None:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = date_range
+        template_id = parse_id(params.get('template'))
+        if params.get('template') is not None and template_id is None:
+            return Response({'error': 'template must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = DistinctCountsService.count(
+            start, end,
+            template_id=template_id,
+            per_day=params.get('per_day') in ('1', 'true'),
+        )
+        return Response({'start': start, 'end': end, 'template': template_id, **result})
+
+    @action(detail=False, methods=['get'])
+    def live(self, request):
+        """
+        Counters from the last `minutes` (default 15) of completed executions,
+        read from Redis. by=user (default; always the current user) returns a
+        per-minute series; by=template|provider|model returns totals per
+        value, or a series for one `value`.
+        """
+        params = request.query_params
+        by = params.get('by', 'user')
+        if by not in LiveMetricsService.DIMENSIONS:
+            return Response(
+                {'error': f'by must be one of: {list(LiveMetricsService.DIMENSIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            minutes = int(params.get('minutes', 15))
+        except ValueError:
+            minutes = 0
+        if not 1 <= minutes <= django_settings.LIVE_METRICS_RETENTION:
+            return Response(
+                {'error': f'minutes must be between 1 and {django_settings.LIVE_METRICS_RETENTION}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        value = request.user.pk if by == 'user' else params.get('value')
+        return Response({'by': by, 'value': value, 'minutes': minutes, **LiveMetricsService.read(by, minutes, value)})
+
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """
+        Daily usage for the current user over the last `days`
+        """
+        days = _days(request.query_params)
+        if days is None:
+            return Response({'error': 'days must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AnalyticsService.get_daily_trends(request.user, days))
+
+    @action(detail=False, methods=['get'])
+    def top_prompts(self, request):
+        """
+        Prompts the current user executed most over the last `days`
+        """
+        days = _days(request.query_params)
+        if days is None:
+            return Response({'error': 'days must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, 100))
+        return Response(AnalyticsService.get_top_prompts(request.user, limit, days))
+
+    @action(detail=False, methods=['get'])
+    def cost_analysis(self, request):
+        """
+        Cost by provider, model and prompt for the current user over the last `days`
+        """
+        days = _days(request.query_params)
+        if days is None:
+            return Response({'error': 'days must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AnalyticsService.get_cost_analysis(request.user, days))
+
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Chart series from the usage cube, downsampled per metric.
+
+        start/end: dates (end inclusive), or the last `days` (default 30)
+        metrics: comma-separated, default execution_count
+        grain: hour|day|week|month|quarter|year (default: finest that fits)
+        points: at most this many points per metric (default 200); mode: lttb|min_max
+        group_by: template|provider|model, one series for each of the `limit` (default 10) busiest
+        template, provider, model: filters; scope=all (staff only) covers every user
+        """
+        params = request.query_params
+        date_range = _date_range(params)
+        if date_range is None:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = date_range
+        try:
+            points = int(params.get('points', 200))
+            limit = min(int(params.get('limit', 10)), 50)
+        except ValueError:
+            return Response({'error': 'points and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 3 <= points <= django_settings.TIMESERIES_MAX_POINTS:
+            return Response(
+                {'error': f'points must be between 3 and {django_settings.TIMESERIES_MAX_POINTS}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        metrics = [m for m in params.get('metrics', 'execution_count').split(',') if m]
+        grain = params.get('grain') or None
+        mode = params.get('mode', 'lttb')
+        group_by = params.get('group_by') or None
+        if not metrics or any(m not in TimeSeriesService.METRICS for m in metrics):
+            return Response({'error': f'metrics accepts: {list(TimeSeriesService.METRICS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if grain and grain not in UsageCubeService.GRAINS:
+            return Response({'error': f'grain must be one of: {list(UsageCubeService.GRAINS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in DOWNSAMPLING_MODES:
+            return Response({'error': f'mode must be one of: {list(DOWNSAMPLING_MODES)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if group_by and group_by not in TimeSeriesService.GROUP_FIELDS:
+            return Response({'error': f'group_by must be one of: {list(TimeSeriesService.GROUP_FIELDS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        template_id = parse_id(params.get('template'))
+        if params.get('template') is not None and template_id is None:
+            return Response({'error': 'template must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+        everyone = params.get('scope') == 'all' and request.user.is_staff
+
+        try:
+            result = TimeSeriesService.series(
+                start, end,
+                metrics=metrics,
+                grain=grain,
+                points=points,
+                mode=mode,
+                group_by=group_by,
+                limit=limit,
+                user=None if everyone else request.user,
+                template_id=template_id,
+                provider=params.get('provider'),
+                model=params.get('model'),
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'start': start, 'end': end, 'mode': mode, 'points': points, 'group_by': group_by, **result})
+
+    @action(detail=False, methods=['get'])
+    def usage(self, request):
+        """
+        Roll the hourly usage cube up to any grain.
+
+        start/end: dates (end inclusive), or the last `days` (default 30)
+        grain: hour|day|week|month|quarter|year (omit for range totals)
+        group_by: comma-separated user,template,provider,model,status
+        template, provider, model: filters
+        order_by: period|execution_count|total_tokens|cost_usd; limit
+        scope=all (staff only) covers every user instead of the caller
+        """
+        params = request.query_params
+        date_range = _date_range(params)
+        if date_range is None:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = date_range
+        try:
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return Response({'error': 'limit must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit is not None and limit < 1:
+            return Response({'error': 'limit must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        grain = params.get('grain') or None
+        group_by = [d for d in params.get('group_by', '').split(',') if d]
+        order_by = params.get('order_by') or None
+        if grain and grain not in UsageCubeService.GRAINS:
+            return Response({'error': f'grain must be one of: {list(UsageCubeService.GRAINS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(d not in UsageCubeService.DIMENSIONS for d in group_by):
+            return Response({'error': f'group_by accepts: {list(UsageCubeService.DIMENSIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if order_by and order_by not in UsageCubeService.ORDERINGS:
+            return Response({'error': f'order_by must be one of: {list(UsageCubeService.ORDERINGS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        template_id = parse_id(params.get('template'))
+        if params.get('template') is not None and template_id is None:
+            return Response({'error': 'template must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+        everyone = params.get('scope') == 'all' and request.user.is_staff
+
+        rows = UsageCubeService.query(
+            start=timezone.make_aware(datetime.combine(start, time.min)),
+            end=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+            grain=grain,
+            group_by=group_by,
+            user=None if everyone else request.user,
+            template_id=template_id,
+            provider=params.get('provider'),
+            model=params.get('model'),
+            order_by=order_by,
+            limit=limit,
+        )
+        return Response({'start': start, 'end': end, 'grain': grain, 'group_by': group_by, 'results': rows})
+
+    @action(detail=False, methods=['get'], url_path=r'versions/(?P<version_id>\d+)/variants')
+    def variant_stats(self, request, version_id=None):
+        """
+        A/B comparison of a version's variants (executions without a variant
+        form the control group): success rate, thumbs-up rate, latency,
+        tokens, cost and rating with 95% intervals, and z / Welch t tests
+        against ?baseline=<variant id> (default: control)
+        """
+        version = get_object_or_404(PromptVersion, pk=version_id)
+        baseline = parse_id(request.query_params.get('baseline'))
+        if request.query_params.get('baseline') is not None and baseline is None:
+            return Response({'error': 'baseline must be a variant id.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = VariantStatsService.compare(version, baseline)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
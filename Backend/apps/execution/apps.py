@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExecutionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.execution'
+
+    def ready(self):
+        import apps.execution.signals
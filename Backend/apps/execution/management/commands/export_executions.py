@@ -0,0 +1,44 @@
+"""
+Export execution history to date-partitioned Parquet or Arrow files
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.execution.services.export_service import FORMATS, ExecutionExportService
+
+
+class Command(BaseCommand):
+    help = "Write executions to OUTPUT/date=YYYY-MM-DD/part-0.<format>, one partition per local date."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Directory to write the partitions to (created if missing).")
+        parser.add_argument('--start', help="First date to export (YYYY-MM-DD). Default: --days ago.")
+        parser.add_argument('--end', help="Last date to export, inclusive (YYYY-MM-DD). Default: today.")
+        parser.add_argument('--days', type=int, default=30, help="Range length when --start is not given.")
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='parquet')
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows per cursor fetch and record batch.")
+
+    def handle(self, *args, **options):
+        try:
+            end = parse_date(options['end']) if options['end'] else timezone.localdate()
+        except ValueError:
+            end = None
+        if end is None:
+            raise CommandError("Invalid --end date.")
+        try:
+            start = parse_date(options['start']) if options['start'] else end - timedelta(days=options['days'])
+        except (ValueError, OverflowError):
+            start = None
+        if start is None or start > end:
+            raise CommandError("Invalid date range.")
+
+        counts = ExecutionExportService.write_partitions(
+            options['output'],
+            ExecutionExportService.queryset(start, end),
+            fmt=options['file_format'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {sum(counts.values())} execution(s) in {len(counts)} partition(s) to {options['output']}"
+        ))
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0002_rename_executionlog_to_execution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='executionfeedback',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            'UPDATE execution_executionfeedback SET updated_at = created_at',
+            migrations.RunSQL.noop,
+        ),
+    ]
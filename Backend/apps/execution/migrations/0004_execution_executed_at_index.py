@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0003_executionfeedback_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='execution',
+            index=models.Index(fields=['executed_at'], name='execution_e_execute_5ac2ba_idx'),
+        ),
+    ]
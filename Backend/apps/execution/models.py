@@ -40,6 +40,7 @@ class Execution(models.Model):
 
     class Meta:
         ordering = ["-executed_at"]
+        indexes = [models.Index(fields=["executed_at"])]
 
     def __str__(self):
         return f"{self.version} | {self.provider} | {self.status}"
@@ -62,3 +63,4 @@ class ExecutionFeedback(models.Model):
     auto_score = models.FloatField(null=True, blank=True)             # LLM-as-a-judge score
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
@@ -0,0 +1,186 @@
+"""
+Service for columnar exports of execution history
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+from apps.execution.models import Execution
+
+# (column, queryset lookup, Arrow type). Prompt text and outputs are left out:
+# they dominate the size and are not needed for usage and quality analysis.
+COLUMNS = [
+    ('id', 'id', pa.int64()),
+    ('executed_at', 'executed_at', pa.timestamp('us', tz='UTC')),
+    ('template_id', 'version__template_id', pa.int64()),
+    ('version_id', 'version_id', pa.int64()),
+    ('variant_id', 'variant_id', pa.int64()),
+    ('user_id', 'executed_by_id', pa.int64()),
+    ('provider', 'provider', pa.string()),
+    ('model', 'model', pa.string()),
+    ('status', 'status', pa.string()),
+    ('prompt_tokens', 'prompt_tokens', pa.int32()),
+    ('completion_tokens', 'completion_tokens', pa.int32()),
+    ('total_tokens', 'total_tokens', pa.int32()),
+    ('cost_usd', Cast('estimated_cost_usd', FloatField()), pa.float64()),
+    ('latency_ms', 'latency_ms', pa.int32()),
+    ('feedback_score', 'feedback__score', pa.int8()),
+    ('feedback_rating', 'feedback__rating', pa.int8()),
+    ('feedback_auto_score', 'feedback__auto_score', pa.float64()),
+]
+SCHEMA = pa.schema([(name, arrow_type) for name, _, arrow_type in COLUMNS])
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+class ExecutionExportService:
+    """
+    Streams executions out of Postgres through a server-side cursor
+    (QuerySet.iterator), converting each fetched chunk into an Arrow record
+    batch, so memory stays bounded by EXECUTION_EXPORT_BATCH_SIZE rows
+    whatever the size of the range. Rows come in executed_at order, which
+    lets partitioned exports keep a single file open at a time.
+
+    Output is Parquet (zstd) or the Arrow IPC file format. Partitioned
+    exports use a Hive layout, date=YYYY-MM-DD/part-0.parquet (local dates),
+    which pandas, polars, DuckDB and pyarrow.dataset read directly.
+    """
+
+    @staticmethod
+    def queryset(start=None, end=None, user=None):
+        """Executions on local dates start..end (inclusive), optionally of one user."""
+        executions = Execution.objects.order_by('executed_at', 'id')
+        if start is not None:
+            executions = executions.filter(executed_at__gte=_start_of(start))
+        if end is not None:
+            executions = executions.filter(executed_at__lt=_start_of(end + timedelta(days=1)))
+        if user is not None:
+            executions = executions.filter(executed_by=user)
+        return executions
+
+    @staticmethod
+    def batches(executions, batch_size=None):
+        """Yield (local date, RecordBatch) pairs; a batch never spans two dates."""
+        batch_size = batch_size or settings.EXECUTION_EXPORT_BATCH_SIZE
+        rows = (
+            executions
+            .annotate(export_date=TruncDate('executed_at'))
+            .values_list('export_date', *(lookup for _, lookup, _ in COLUMNS))
+            .iterator(chunk_size=batch_size)
+        )
+        chunk, day = [], None
+        for row in rows:
+            if chunk and (row[0] != day or len(chunk) >= batch_size):
+                yield day, _record_batch(chunk)
+                chunk = []
+            day = row[0]
+            chunk.append(row[1:])
+        if chunk:
+            yield day, _record_batch(chunk)
+
+    @staticmethod
+    def write(sink, executions, fmt='parquet', batch_size=None):
+        """Write all executions to one file (a path or a binary file object). Returns the row count."""
+        rows = 0
+        with _writer(sink, fmt) as writer:
+            for _, batch in ExecutionExportService.batches(executions, batch_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+
+    @staticmethod
+    def stream(executions, fmt='parquet', batch_size=None):
+        """
+        Yield one file's bytes while it is written, a chunk per record batch.
+        Both formats are written front to back with the footer last, so a
+        response can start before the export finishes.
+        """
+        sink = _ChunkSink()
+        with _writer(pa.PythonFile(sink, mode='w'), fmt) as writer:
+            for _, batch in ExecutionExportService.batches(executions, batch_size):
+                writer.write_batch(batch)
+                yield sink.take()
+        yield sink.take()
+
+    @staticmethod
+    def write_partitions(directory, executions, fmt='parquet', batch_size=None):
+        """
+        Write one file per local date under `directory`. Each partition is
+        written to a temporary file and renamed into place, so re-exporting
+        a range replaces its partitions and readers never see half a file.
+        Returns {date: row count}.
+        """
+        counts = {}
+        writer = path = temporary = None
+        try:
+            for day, batch in ExecutionExportService.batches(executions, batch_size):
+                if day not in counts:
+                    if writer is not None:
+                        writer.close()
+                        os.replace(temporary, path)
+                    partition = os.path.join(directory, f'date={day.isoformat()}')
+                    os.makedirs(partition, exist_ok=True)
+                    path = os.path.join(partition, f'part-0{FORMATS[fmt]}')
+                    descriptor, temporary = tempfile.mkstemp(dir=partition, suffix='.tmp')
+                    os.close(descriptor)
+                    writer = _writer(temporary, fmt)
+                    counts[day] = 0
+                writer.write_batch(batch)
+                counts[day] += batch.num_rows
+            if writer is not None:
+                writer.close()
+                os.replace(temporary, path)
+                writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+                os.remove(temporary)
+        return counts
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _record_batch(rows):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=arrow_type) for values, (_, _, arrow_type) in zip(columns, COLUMNS)],
+        schema=SCHEMA,
+    )
+
+
+class _ChunkSink:
+    """Write-only file object collecting what was written since the last take()."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _writer(sink, fmt):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, SCHEMA, compression='zstd')
+    if fmt == 'arrow':
+        return pa.ipc.new_file(sink, SCHEMA)
+    raise ValueError(f'Unknown export format: {fmt}')
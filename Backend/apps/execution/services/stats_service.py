@@ -0,0 +1,74 @@
+"""
+Service for per-user execution statistics
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from apps.execution.models import Execution
+from common.cache import get_version
+
+
+def user_namespace(user_id):
+    """Cache namespace bumped whenever one of the user's executions changes (see signals)."""
+    return f'executions:user:{user_id}'
+
+
+class ExecutionStatsService:
+    """
+    Dashboard and statistics numbers for one user's executions.
+
+    Everything comes from a single GROUP BY provider query with conditional
+    aggregates; the overall totals are sums of the provider rows. The result
+    is cached per user under a namespace that new and updated executions
+    bump, so a dashboard refresh costs one cache read until the user runs
+    something. TemplateAnalytics rollups are per template, not per user, so
+    they cannot serve these numbers.
+    """
+
+    @staticmethod
+    def user_summary(user):
+        cache_key = f'execution-stats:{user.pk}:{get_version(user_namespace(user.pk))}'
+        summary = cache.get(cache_key)
+        if summary is None:
+            summary = ExecutionStatsService._compute(user)
+            cache.set(cache_key, summary, settings.EXECUTION_STATS_CACHE_TTL)
+        return summary
+
+    @staticmethod
+    def _compute(user):
+        rows = (
+            Execution.objects
+            .filter(executed_by=user)
+            .order_by()
+            .values('provider')
+            .annotate(
+                count=Count('id'),
+                successful=Count('id', filter=Q(status=Execution.STATUS_SUCCESS)),
+                failed=Count('id', filter=Q(status=Execution.STATUS_FAILED)),
+                cost=Sum('estimated_cost_usd'),
+                tokens=Sum('total_tokens'),
+                latency_sum=Sum('latency_ms'),
+                latency_count=Count('latency_ms'),
+            )
+        )
+        total = successful = failed = cost = tokens = latency_sum = latency_count = 0
+        provider_breakdown = {}
+        for row in rows:
+            provider_breakdown[row['provider']] = row['count']
+            total += row['count']
+            successful += row['successful']
+            failed += row['failed']
+            cost += row['cost'] or 0
+            tokens += row['tokens'] or 0
+            latency_sum += row['latency_sum'] or 0
+            latency_count += row['latency_count']
+        return {
+            'total_executions': total,
+            'successful_executions': successful,
+            'failed_executions': failed,
+            'success_rate': round((successful / total * 100) if total > 0 else 0, 2),
+            'total_cost': float(cost),
+            'total_tokens': tokens,
+            'avg_duration_ms': round(latency_sum / latency_count, 2) if latency_count else 0,
+            'provider_breakdown': provider_breakdown,
+        }
@@ -0,0 +1,20 @@
+"""
+Execution lifecycle signals, and handlers invalidating cached execution
+statistics
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from common.cache import bump_version
+from .models import Execution
+from .services.stats_service import user_namespace
+
+# Sent once per execution after its final status is saved, with `execution`
+execution_completed = Signal()
+
+
+@receiver(post_save, sender=Execution)
+@receiver(post_delete, sender=Execution)
+def invalidate_user_stats(sender, instance, raw=False, **kwargs):
+    if raw or instance.executed_by_id is None:
+        return
+    bump_version(user_namespace(instance.executed_by_id))
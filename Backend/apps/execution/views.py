@@ -6,12 +6,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 import re
 import time
 
 from .models import Execution, ExecutionFeedback
 from .serializers import ExecutionSerializer, ExecutionFeedbackSerializer
+from .services.export_service import FORMATS as EXPORT_FORMATS, ExecutionExportService
+from .services.stats_service import ExecutionStatsService
+from .signals import execution_completed
 from apps.prompts.models import PromptTemplate, PromptVersion
+from apps.prompts.services.template_registry import registry as template_registry
 
 
 # System prompt injected into every execution to enforce consistent markdown/math output
@@ -62,24 +71,21 @@ class ExecutionViewSet(viewsets.ModelViewSet):
         if provider_key not in PROVIDER_DEFAULTS:
             return Response({'error': f'Unknown provider "{provider_key}". Choose from: {list(PROVIDER_DEFAULTS.keys())}'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Resolve template → latest version
+        # Resolve template → latest version (in-process registry; no query when hot)
         try:
-            template = PromptTemplate.objects.get(id=prompt_id)
-        except PromptTemplate.DoesNotExist:
+            compiled = template_registry.get(prompt_id)
+        except (PromptTemplate.DoesNotExist, TypeError, ValueError):
             return Response({'error': f'Prompt {prompt_id} not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        version = template.current_version
-        if not version:
+        if compiled is None:
             return Response({'error': 'This prompt has no versions yet.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Render prompt body with variables
-        rendered = version.body
-        for key, val in (input_vars or {}).items():
-            rendered = rendered.replace(f'{{{{{key}}}}}', str(val))
+        rendered = compiled.render(input_vars)
 
         # Create execution record
         execution = Execution.objects.create(
-            version=version,
+            version=compiled.version,
             provider=provider_key,
             model=model_name,
             input_variables=input_vars,
@@ -95,6 +101,7 @@ class ExecutionViewSet(viewsets.ModelViewSet):
             execution.status = Execution.STATUS_FAILED
             execution.error_message = f'{meta["env_key"]} is not configured on the server.'
             execution.save()
+            execution_completed.send(sender=Execution, execution=execution)
             return Response(ExecutionSerializer(execution).data, status=status.HTTP_200_OK)
 
         try:
@@ -158,6 +165,7 @@ class ExecutionViewSet(viewsets.ModelViewSet):
             execution.error_message = str(e)
             execution.save()
 
+        execution_completed.send(sender=Execution, execution=execution)
         return Response(ExecutionSerializer(execution).data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
@@ -168,24 +176,64 @@ class ExecutionViewSet(viewsets.ModelViewSet):
         """
         Get execution statistics for the current user
         """
-        executions = Execution.objects.filter(executed_by=request.user)
-        total = executions.count()
-        success = executions.filter(status=Execution.STATUS_SUCCESS).count()
-        failed = executions.filter(status=Execution.STATUS_FAILED).count()
-        
+        summary = ExecutionStatsService.user_summary(request.user)
         stats = {
-            'total_executions': total,
-            'successful_executions': success,
-            'failed_executions': failed,
-            'success_rate': round((success / total * 100) if total > 0 else 0, 2)
+            key: summary[key]
+            for key in ('total_executions', 'successful_executions', 'failed_executions', 'success_rate')
         }
         return Response(stats)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Download executions from start..end (dates, inclusive; default the
+        last 30 days) as one Parquet file, or an Arrow IPC file with
+        file_format=arrow. scope=all (staff only) covers every user.
+        """
+        params = request.query_params
+        try:
+            end = parse_date(params['end']) if params.get('end') else timezone.localdate()
+        except ValueError:
+            end = None
+        if end is None:
+            return Response({'error': 'Invalid end date.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_date(params['start']) if params.get('start') else end - timedelta(days=int(params.get('days', 30)))
+        except (ValueError, OverflowError):
+            start = None
+        if start is None or start > end:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= django_settings.EXECUTION_EXPORT_MAX_DAYS:
+            return Response(
+                {'error': f'At most {django_settings.EXECUTION_EXPORT_MAX_DAYS} days per export.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        file_format = params.get('file_format', 'parquet')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'file_format must be one of: {sorted(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        everyone = params.get('scope') == 'all' and request.user.is_staff
+        executions = ExecutionExportService.queryset(start, end, user=None if everyone else request.user)
+        response = StreamingHttpResponse(
+            ExecutionExportService.stream(executions, fmt=file_format),
+            content_type='application/octet-stream',
+        )
+        filename = f'executions-{start.isoformat()}-{end.isoformat()}{EXPORT_FORMATS[file_format]}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=False, methods=['get'], url_path='providers')
     def providers(self, request):
         """
         Return configuration status of each LLM provider (reads from server settings).
         """
+        return Response(cache.get_or_set('execution-providers', self._provider_status, django_settings.RESPONSE_CACHE_TTL))
+
+    @staticmethod
+    def _provider_status():
         result = []
         for provider_id, meta in PROVIDER_DEFAULTS.items():
             is_configured = bool(getattr(django_settings, meta["env_key"], ""))
@@ -194,7 +242,7 @@ class ExecutionViewSet(viewsets.ModelViewSet):
                 "name": meta["name"],
                 "is_configured": is_configured,
             })
-        return Response(result)
+        return result
 
     @action(detail=False, methods=['post'], url_path='test-provider')
     def test_provider(self, request):
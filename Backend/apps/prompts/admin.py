@@ -1,15 +1,34 @@
+from django import forms
 from django.contrib import admin
 from .models import Category, Tag, PromptTemplate, PromptVersion, PromptVariant
 
 
+class BlobBodyForm(forms.ModelForm):
+    """Edits the blob-backed `body` of versions and variants as a plain text area."""
+    body = forms.CharField(widget=forms.Textarea, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['body'].initial = self.instance.body
+
+    def save(self, commit=True):
+        self.instance.body = self.cleaned_data.get('body') or ''
+        return super().save(commit)
+
+
 class PromptVersionInline(admin.TabularInline):
     model = PromptVersion
+    form = BlobBodyForm
+    exclude = ('blob',)
     extra = 0
     readonly_fields = ('version_number', 'created_at', 'created_by')
 
 
 class PromptVariantInline(admin.TabularInline):
     model = PromptVariant
+    form = BlobBodyForm
+    exclude = ('blob',)
     extra = 0
     readonly_fields = ('created_at', 'created_by')
 
@@ -37,14 +56,18 @@ class PromptTemplateAdmin(admin.ModelAdmin):
 
 @admin.register(PromptVersion)
 class PromptVersionAdmin(admin.ModelAdmin):
+    form = BlobBodyForm
+    exclude = ('blob',)
     list_display = ('template', 'version_number', 'created_by', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('template__title', 'body')
+    search_fields = ('template__title', 'blob__body')
     inlines = [PromptVariantInline]
 
 
 @admin.register(PromptVariant)
 class PromptVariantAdmin(admin.ModelAdmin):
+    form = BlobBodyForm
+    exclude = ('blob',)
     list_display = ('version', 'name', 'created_by', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('name', 'version__template__title')
@@ -0,0 +1,128 @@
+"""
+API key authentication for programmatic clients
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+from common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+USAGE_HASH = 'prompt-library:api-key-last-used'
+
+
+class APIKeyAuthentication(authentication.BaseAuthentication):
+    """
+    Authorization: Api-Key <key>
+
+    The key's SHA-256 is resolved to (key id, user) through an in-process
+    map (API_KEY_LOCAL_TTL) and then the shared cache (API_KEY_CACHE_TTL)
+    before falling back to the database. Deleting a key evicts it from both
+    in the deleting process; other processes drop it within the local TTL.
+
+    last_used_at is not written per request: uses are recorded in a Redis
+    hash (at most once per API_KEY_USAGE_RESOLUTION seconds per key and
+    process) and flushed to the table in bulk by flush_api_key_usage.
+    """
+    keyword = 'Api-Key'
+
+    _lock = threading.Lock()
+    _local = {}        # key hash -> (expires_at, key id, user)
+    _last_recorded = {}  # key id -> monotonic time of the last usage write
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid API key header.')
+        try:
+            raw_key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid API key.')
+
+        key_hash = hashlib.sha256(raw_key.encode()).hexdigest()
+        key_id, user = self._resolve(key_hash)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('Invalid API key.')
+        self._record_use(key_id)
+        return user, key_id
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+    @staticmethod
+    def cache_key(key_hash):
+        return f'api-key:{key_hash}'
+
+    @classmethod
+    def _resolve(cls, key_hash):
+        now = time.monotonic()
+        with cls._lock:
+            hit = cls._local.get(key_hash)
+        if hit is not None and hit[0] > now:
+            return hit[1], hit[2]
+
+        resolved = cache.get(cls.cache_key(key_hash))
+        if resolved is None:
+            from apps.prompts.models import APIKey
+            api_key = APIKey.objects.select_related('user').filter(key_hash=key_hash).first()
+            if api_key is None:
+                return None, None
+            resolved = (api_key.pk, api_key.user)
+            cache.set(cls.cache_key(key_hash), resolved, settings.API_KEY_CACHE_TTL)
+
+        with cls._lock:
+            cls._local[key_hash] = (now + settings.API_KEY_LOCAL_TTL, *resolved)
+        return resolved
+
+    @classmethod
+    def invalidate(cls, key_hash):
+        with cls._lock:
+            cls._local.pop(key_hash, None)
+        cache.delete(cls.cache_key(key_hash))
+
+    @classmethod
+    def _record_use(cls, key_id):
+        now = time.monotonic()
+        with cls._lock:
+            last = cls._last_recorded.get(key_id)
+            if last is not None and now - last < settings.API_KEY_USAGE_RESOLUTION:
+                return
+            cls._last_recorded[key_id] = now
+        try:
+            get_redis().hset(USAGE_HASH, key_id, timezone.now().timestamp())
+        except Exception:
+            logger.warning('Could not record API key usage', exc_info=True)
+
+    @staticmethod
+    def flush_usage():
+        """
+        Move recorded uses into APIKey.last_used_at with one UPDATE per batch.
+        Returns the number of keys updated.
+        """
+        from apps.prompts.models import APIKey
+        client = get_redis()
+        processing = f'{USAGE_HASH}:flushing'
+        # A leftover from a failed flush is retried before taking new uses
+        if not client.exists(processing):
+            try:
+                client.rename(USAGE_HASH, processing)
+            except redis.ResponseError:  # nothing recorded since the last flush
+                return 0
+        used = {int(k): float(v) for k, v in client.hgetall(processing).items()}
+        keys = list(APIKey.objects.filter(pk__in=used).only('id', 'last_used_at'))
+        for api_key in keys:
+            used_at = datetime.fromtimestamp(used[api_key.pk], tz=dt_timezone.utc)
+            if api_key.last_used_at is None or used_at > api_key.last_used_at:
+                api_key.last_used_at = used_at
+        APIKey.objects.bulk_update(keys, ['last_used_at'], batch_size=500)
+        client.delete(processing)
+        return len(keys)
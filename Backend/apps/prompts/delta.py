@@ -0,0 +1,136 @@
+"""
+Line-based deltas between prompt bodies, and line/word diffs built from them.
+
+A delta rebuilds a target text from a base text as a list of ops:
+    ["c", i1, i2]   copy base lines i1..i2 (keepends)
+    ["i", text]     insert literal text
+"""
+import difflib
+import json
+import re
+
+WORD_RE = re.compile(r'\s+|\w+|[^\w\s]')
+
+
+def _lines(text):
+    return text.splitlines(keepends=True)
+
+
+def make_delta(base, target):
+    """Return the ops rebuilding `target` from `base`."""
+    base_lines = _lines(base)
+    target_lines = _lines(target)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['c', i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(['i', ''.join(target_lines[j1:j2])])
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = _lines(base)
+    parts = []
+    for op in ops:
+        if op[0] == 'c':
+            parts.append(''.join(base_lines[op[1]:op[2]]))
+        else:
+            parts.append(op[1])
+    return ''.join(parts)
+
+
+def delta_size(ops):
+    return len(json.dumps(ops, separators=(',', ':')).encode())
+
+
+def _hunk(op, lines):
+    return {'op': op, 'lines': lines}
+
+
+def line_diff(old, new):
+    """Line diff old -> new as [{'op': 'equal'|'delete'|'insert', 'lines': [...]}]."""
+    old_lines = _lines(old)
+    new_lines = _lines(new)
+    hunks = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            hunks.append(_hunk('equal', old_lines[i1:i2]))
+            continue
+        if i2 > i1:
+            hunks.append(_hunk('delete', old_lines[i1:i2]))
+        if j2 > j1:
+            hunks.append(_hunk('insert', new_lines[j1:j2]))
+    return hunks
+
+
+def line_diff_from_delta(new, ops):
+    """
+    Line diff old -> new where `ops` is the stored delta rebuilding `old` from
+    `new` (how superseded versions are stored). Avoids re-running the matcher.
+    """
+    new_lines = _lines(new)
+    hunks = []
+    pos = 0
+    deleted = []
+
+    def flush(upto):
+        if deleted:
+            hunks.append(_hunk('delete', list(deleted)))
+            deleted.clear()
+        if upto > pos:
+            hunks.append(_hunk('insert', new_lines[pos:upto]))
+
+    for op in ops:
+        if op[0] == 'i':
+            deleted.extend(_lines(op[1]))
+            continue
+        _, i1, i2 = op
+        flush(i1)
+        hunks.append(_hunk('equal', new_lines[i1:i2]))
+        pos = i2
+    flush(len(new_lines))
+    return hunks
+
+
+def word_diff(hunks):
+    """
+    Refine a line diff into word-level segments [{'op', 'text'}]; only the
+    delete/insert pairs are re-diffed, equal blocks pass through whole.
+    """
+    segments = []
+    i = 0
+    while i < len(hunks):
+        hunk = hunks[i]
+        if hunk['op'] == 'equal':
+            segments.append({'op': 'equal', 'text': ''.join(hunk['lines'])})
+            i += 1
+            continue
+        old_text = new_text = ''
+        while i < len(hunks) and hunks[i]['op'] != 'equal':
+            if hunks[i]['op'] == 'delete':
+                old_text += ''.join(hunks[i]['lines'])
+            else:
+                new_text += ''.join(hunks[i]['lines'])
+            i += 1
+        old_words = WORD_RE.findall(old_text)
+        new_words = WORD_RE.findall(new_text)
+        matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                segments.append({'op': 'equal', 'text': ''.join(old_words[i1:i2])})
+                continue
+            if i2 > i1:
+                segments.append({'op': 'delete', 'text': ''.join(old_words[i1:i2])})
+            if j2 > j1:
+                segments.append({'op': 'insert', 'text': ''.join(new_words[j1:j2])})
+    return segments
+
+
+def diff_stats(hunks):
+    return {
+        'lines_added': sum(len(h['lines']) for h in hunks if h['op'] == 'insert'),
+        'lines_removed': sum(len(h['lines']) for h in hunks if h['op'] == 'delete'),
+    }
@@ -0,0 +1,24 @@
+"""
+Compile the prompt catalog into a memory-mappable snapshot file
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.prompts.services.snapshot_service import SnapshotService
+
+
+class Command(BaseCommand):
+    help = "Write active templates and their current versions to a snapshot file (see apps/prompts/snapshot.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None, help="Output file (default: PROMPT_SNAPSHOT_PATH).")
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Re-encode only templates changed since the existing snapshot.",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.PROMPT_SNAPSHOT_PATH
+        if not path:
+            raise CommandError("Pass --path or set PROMPT_SNAPSHOT_PATH.")
+        written, recompiled = SnapshotService.build(path, incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} template(s) to {path} ({recompiled} recompiled)"))
@@ -0,0 +1,22 @@
+"""
+Rewrite existing version histories with delta storage
+"""
+from django.core.management.base import BaseCommand
+from apps.prompts.models import PromptTemplate
+from apps.prompts.services.blob_service import BlobService
+
+
+class Command(BaseCommand):
+    help = "Store superseded version bodies as deltas (see PROMPT_DELTA_STORAGE)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('template_ids', nargs='*', type=int, help="Limit to these templates.")
+
+    def handle(self, *args, **options):
+        templates = PromptTemplate.objects.order_by('id')
+        if options['template_ids']:
+            templates = templates.filter(id__in=options['template_ids'])
+        total = 0
+        for template_id in templates.values_list('id', flat=True).iterator():
+            total += BlobService.compact_template(template_id)
+        self.stdout.write(self.style.SUCCESS(f"Rewrote {total} blob(s) as deltas"))
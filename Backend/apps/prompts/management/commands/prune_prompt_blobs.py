@@ -0,0 +1,33 @@
+"""
+Delete prompt body blobs no longer referenced by any version or variant
+"""
+from django.core.management.base import BaseCommand
+from apps.prompts.models import PromptBlob, PromptVariant, PromptVersion
+
+
+class Command(BaseCommand):
+    help = "Delete PromptBlob rows that no version or variant references."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many blobs would be deleted.")
+
+    def _orphans(self):
+        # Blobs still serving as a delta base are kept until their dependants go
+        return (
+            PromptBlob.objects
+            .exclude(hash__in=PromptVersion.objects.values('blob_id'))
+            .exclude(hash__in=PromptVariant.objects.values('blob_id'))
+            .exclude(hash__in=PromptBlob.objects.filter(base__isnull=False).values('base_id'))
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{self._orphans().count()} orphaned blob(s) deletable in the first pass")
+            return
+        total = 0
+        while True:
+            deleted, _ = self._orphans().delete()
+            if not deleted:
+                break
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} orphaned blob(s)"))
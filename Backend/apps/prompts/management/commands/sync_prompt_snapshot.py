@@ -0,0 +1,22 @@
+"""
+Keep this host's prompt snapshot current by following broadcast rebuilds
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.prompts.services.snapshot_service import SnapshotService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild PROMPT_SNAPSHOT_PATH on this host whenever a rebuild is broadcast (runs until stopped). "
+        "Run one per host that reads the snapshot; the Celery worker's host is refreshed by the task itself."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.PROMPT_SNAPSHOT_PATH:
+            raise CommandError("PROMPT_SNAPSHOT_PATH is not set.")
+        self.stdout.write(f"Following {settings.PROMPT_SNAPSHOT_CHANNEL} for {settings.PROMPT_SNAPSHOT_PATH}")
+        try:
+            SnapshotService.listen()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+BACKFILL_SEARCH_VECTOR = """
+UPDATE prompts_prompttemplate t SET search_vector =
+    setweight(to_tsvector('english', COALESCE(t.title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(t.description, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE((
+        SELECT string_agg(tag.name, ' ')
+        FROM prompts_tag tag
+        JOIN prompts_prompttemplate_tags tt ON tt.tag_id = tag.id
+        WHERE tt.prompttemplate_id = t.id
+    ), '')), 'C') ||
+    setweight(to_tsvector('english', COALESCE((
+        SELECT v.body
+        FROM prompts_promptversion v
+        WHERE v.template_id = t.id
+        ORDER BY v.version_number DESC
+        LIMIT 1
+    ), '')), 'D');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0002_apikey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompttemplate',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplate',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='prompttemplate_search_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,93 @@
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+
+def move_bodies_to_blobs(apps, schema_editor):
+    PromptBlob = apps.get_model('prompts', 'PromptBlob')
+    for model_name in ('PromptVersion', 'PromptVariant'):
+        Model = apps.get_model('prompts', model_name)
+        batch = []
+        for row in Model.objects.only('id', 'body').iterator(chunk_size=BATCH_SIZE):
+            row.blob_id = hashlib.sha256(row.body.encode()).hexdigest()
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                _flush(PromptBlob, Model, batch)
+                batch = []
+        if batch:
+            _flush(PromptBlob, Model, batch)
+
+
+def _flush(PromptBlob, Model, rows):
+    blobs = {
+        row.blob_id: PromptBlob(hash=row.blob_id, body=row.body, size=len(row.body.encode()))
+        for row in rows
+    }
+    PromptBlob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+    Model.objects.bulk_update(rows, ['blob'])
+
+
+def restore_bodies(apps, schema_editor):
+    for model_name in ('PromptVersion', 'PromptVariant'):
+        Model = apps.get_model('prompts', model_name)
+        batch = []
+        for row in Model.objects.select_related('blob').iterator(chunk_size=BATCH_SIZE):
+            row.body = row.blob.body
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                Model.objects.bulk_update(batch, ['body'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['body'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromptBlob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('body', models.TextField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='promptversion',
+            name='blob',
+            field=models.ForeignKey(db_column='body_hash', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='prompts.promptblob'),
+        ),
+        migrations.AddField(
+            model_name='promptvariant',
+            name='blob',
+            field=models.ForeignKey(db_column='body_hash', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='prompts.promptblob'),
+        ),
+        migrations.RunPython(move_bodies_to_blobs, restore_bodies),
+        migrations.RemoveField(
+            model_name='promptversion',
+            name='body',
+        ),
+        migrations.RemoveField(
+            model_name='promptvariant',
+            name='body',
+        ),
+        migrations.AlterField(
+            model_name='promptversion',
+            name='blob',
+            field=models.ForeignKey(db_column='body_hash', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='prompts.promptblob'),
+        ),
+        migrations.AlterField(
+            model_name='promptvariant',
+            name='blob',
+            field=models.ForeignKey(db_column='body_hash', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='prompts.promptblob'),
+        ),
+    ]
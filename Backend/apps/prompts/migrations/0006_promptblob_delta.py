@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0005_promptblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promptblob',
+            name='base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='prompts.promptblob'),
+        ),
+        migrations.AddField(
+            model_name='promptblob',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='promptblob',
+            name='body',
+            field=models.TextField(null=True),
+        ),
+    ]
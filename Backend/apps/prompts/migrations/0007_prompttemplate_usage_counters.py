@@ -0,0 +1,66 @@
+# Generated by Django 4.2.9 on 2026-10-19 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prompts', '0006_promptblob_delta'),
+        ('execution', '0004_execution_executed_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompttemplate',
+            name='execution_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='prompttemplate',
+            name='last_executed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='prompttemplate',
+            name='success_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='prompttemplate',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=6, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplate',
+            index=models.Index(fields=['execution_count', 'id'], name='prompttemplate_most_used'),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplate',
+            index=models.Index(models.OrderBy(models.F('last_executed_at'), nulls_first=True), models.F('id'), name='prompttemplate_recently_used'),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplate',
+            index=models.Index(fields=['total_cost', 'id'], name='prompttemplate_most_expensive'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE prompts_prompttemplate t
+            SET execution_count = s.executions, success_count = s.successes,
+                last_executed_at = s.last_executed_at, total_cost = s.cost
+            FROM (
+                SELECT v.template_id,
+                       COUNT(*) AS executions,
+                       COUNT(*) FILTER (WHERE e.status = 'success') AS successes,
+                       MAX(e.executed_at) AS last_executed_at,
+                       COALESCE(SUM(e.estimated_cost_usd), 0) AS cost
+                FROM execution_execution e
+                JOIN prompts_promptversion v ON v.id = e.version_id
+                WHERE e.status IN ('success', 'failed')
+                GROUP BY v.template_id
+            ) s
+            WHERE s.template_id = t.id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
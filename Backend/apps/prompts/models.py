@@ -1,7 +1,13 @@
 import secrets
 import hashlib
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from .delta import apply_delta
 
 
 class Category(models.Model):
@@ -11,6 +17,9 @@ class Category(models.Model):
 
     class Meta:
         verbose_name_plural = "categories"
+        indexes = [
+            GinIndex(fields=["name"], name="category_name_trgm", opclasses=["gin_trgm_ops"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -20,6 +29,11 @@ class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["name"], name="tag_name_trgm", opclasses=["gin_trgm_ops"]),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -46,13 +60,33 @@ class PromptTemplate(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description/tags/current body — maintained by SearchService
+    search_vector = SearchVectorField(null=True, editable=False)
+    # All-time usage of every version — maintained by TemplateUsageService
+    execution_count = models.PositiveIntegerField(default=0, editable=False)
+    success_count = models.PositiveIntegerField(default=0, editable=False)
+    last_executed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=6, default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="prompttemplate_search_gin"),
+            GinIndex(fields=["title"], name="prompttemplate_title_trgm", opclasses=["gin_trgm_ops"]),
+            # Match TemplateOrderingFilter, read forwards or backwards
+            models.Index(fields=["execution_count", "id"], name="prompttemplate_most_used"),
+            models.Index(
+                models.F("last_executed_at").asc(nulls_first=True), models.F("id"),
+                name="prompttemplate_recently_used",
+            ),
+            models.Index(fields=["total_cost", "id"], name="prompttemplate_most_expensive"),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def current_version(self):
-        return self.versions.order_by("-version_number").first()
+        return self.versions.select_related("blob").order_by("-version_number").first()
 
 
 class APIKey(models.Model):
@@ -78,12 +112,127 @@ class APIKey(models.Model):
         return prefix, key_hash, raw
 
 
-class PromptVersion(models.Model):
+class PromptBlob(models.Model):
+    """
+    Immutable prompt body stored once, keyed by the SHA-256 of its text.
+
+    With PROMPT_DELTA_STORAGE on, superseded bodies may be stored as a line
+    delta against a newer blob instead (`body` is then NULL); see BlobService.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    body = models.TextField(null=True)               # NULL when stored as a delta
+    base = models.ForeignKey(
+        "self", on_delete=models.PROTECT,
+        null=True, blank=True, related_name="+"
+    )
+    delta = models.JSONField(null=True, blank=True)  # ops rebuilding this body from base
+    size = models.PositiveIntegerField()             # UTF-8 bytes of the full body
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash[:12]
+
+    @property
+    def text(self):
+        """The full body, rebuilt from the delta chain when not stored whole."""
+        if self.body is not None:
+            return self.body
+        return PromptBlob.load_text(self.hash)
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def load_text(blob_hash):
+        """
+        Rebuild a body by fetching its delta chain in one recursive query.
+        Bodies never change for a given hash, so results are cached in-process
+        and in the shared cache without invalidation.
+        """
+        cache_key = f"prompt-blob:{blob_hash}"
+        text = cache.get(cache_key)
+        if text is not None:
+            return text
+        chain = PromptBlob.objects.raw(
+            """
+            WITH RECURSIVE chain AS (
+                SELECT hash, body, base_id, delta, 0 AS depth
+                FROM prompts_promptblob WHERE hash = %s
+                UNION ALL
+                SELECT b.hash, b.body, b.base_id, b.delta, c.depth + 1
+                FROM prompts_promptblob b JOIN chain c ON b.hash = c.base_id
+            )
+            SELECT hash, body, base_id, delta FROM chain ORDER BY depth DESC
+            """,
+            [blob_hash],
+        )
+        text = None
+        for link in chain:
+            text = link.body if link.body is not None else apply_delta(text, link.delta)
+        cache.set(cache_key, text, settings.PROMPT_BLOB_CACHE_TTL)
+        return text
+
+    @staticmethod
+    def hash_body(body):
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    @classmethod
+    def store(cls, body):
+        """Insert the body if it is new (INSERT ... ON CONFLICT DO NOTHING) and return its blob."""
+        blob = cls(hash=cls.hash_body(body), body=body, size=len(body.encode()))
+        cls.objects.bulk_create([blob], ignore_conflicts=True)
+        blob._state.adding = False
+        return blob
+
+
+class BlobBodyModel(models.Model):
+    """
+    Stores `body` in PromptBlob and keeps only the hash on the row.
+
+    `body` reads and writes like a field; assignments are persisted on save().
+    Copying `blob_id` between rows copies the body without reading it.
+    """
+    blob = models.ForeignKey(
+        PromptBlob, on_delete=models.PROTECT,
+        db_column="body_hash", related_name="+"
+    )
+
+    _pending_body = None
+
+    class Meta:
+        abstract = True
+
+    @property
+    def body(self):
+        if self._pending_body is not None:
+            return self._pending_body
+        if self.blob_id is None:
+            return ""
+        return self.blob.text
+
+    @body.setter
+    def body(self, value):
+        self._pending_body = value
+
+    @property
+    def body_hash(self):
+        if self._pending_body is not None:
+            return PromptBlob.hash_body(self._pending_body)
+        return self.blob_id
+
+    def save(self, *args, **kwargs):
+        if self._pending_body is None and self.blob_id is None:
+            self._pending_body = ""
+        if self._pending_body is not None:
+            self.blob = PromptBlob.store(self._pending_body)
+            self._pending_body = None
+        super().save(*args, **kwargs)
+
+
+class PromptVersion(BlobBodyModel):
     template = models.ForeignKey(
         PromptTemplate, on_delete=models.CASCADE, related_name="versions"
     )
     version_number = models.PositiveIntegerField()
-    body = models.TextField()                        # The actual prompt text with {{variables}}
+    # body (the prompt text with {{variables}}) lives in PromptBlob — see BlobBodyModel
     variables = models.JSONField(default=list)       # ["topic", "tone", "audience"]
     change_note = models.CharField(max_length=500, blank=True)
     created_by = models.ForeignKey(
@@ -100,13 +249,12 @@ class PromptVersion(models.Model):
         return f"{self.template.title} v{self.version_number}"
 
 
-class PromptVariant(models.Model):
+class PromptVariant(BlobBodyModel):
     """A/B testing variants tied to a specific version."""
     version = models.ForeignKey(
         PromptVersion, on_delete=models.CASCADE, related_name="variants"
     )
     name = models.CharField(max_length=100)          # e.g. "Variant A", "Variant B"
-    body = models.TextField()
     variables = models.JSONField(default=list)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -1,8 +1,12 @@
 """
 Repository for prompt data access
 """
-from django.db.models import Count, Q
-from apps.prompts.models import PromptTemplate, PromptVersion
+from functools import reduce
+import operator
+from django.db import connection
+from django.db.models import Prefetch, Q
+from apps.prompts.models import PromptTemplate, PromptVersion, PromptVariant
+from apps.prompts.services.search_service import SearchService
 
 
 class PromptRepository:
@@ -23,10 +27,7 @@ class PromptRepository:
             if 'category' in filters:
                 queryset = queryset.filter(category=filters['category'])
             if 'search' in filters:
-                queryset = queryset.filter(
-                    Q(title__icontains=filters['search']) |
-                    Q(description__icontains=filters['search'])
-                )
+                queryset = SearchService.search(queryset, filters['search'])
         
         return queryset
 
@@ -63,13 +64,133 @@ class PromptRepository:
         prompt.save()
         return prompt
 
+    @staticmethod
+    def get_facet_counts(queryset):
+        """
+        Count the templates in `queryset` per status, category and tag, plus the
+        total, in a single GROUPING SETS query.
+        """
+        subquery, params = queryset.order_by().values('id').query.sql_with_params()
+        sql = f"""
+            SELECT t.status, c.id, c.name, tg.id, tg.name,
+                   GROUPING(t.status), GROUPING(c.id), GROUPING(tg.id),
+                   COUNT(DISTINCT t.id)
+            FROM prompts_prompttemplate t
+            LEFT JOIN prompts_category c ON c.id = t.category_id
+            LEFT JOIN prompts_prompttemplate_tags tt ON tt.prompttemplate_id = t.id
+            LEFT JOIN prompts_tag tg ON tg.id = tt.tag_id
+            WHERE t.id IN ({subquery})
+            GROUP BY GROUPING SETS ((t.status), (c.id, c.name), (tg.id, tg.name), ())
+        """
+        facets = {'total': 0, 'status': [], 'category': [], 'tags': []}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        for status, cat_id, cat_name, tag_id, tag_name, g_status, g_cat, g_tag, count in rows:
+            if g_status and g_cat and g_tag:
+                facets['total'] = count
+            elif not g_status:
+                facets['status'].append({'value': status, 'count': count})
+            elif not g_cat:
+                facets['category'].append({'id': cat_id, 'name': cat_name, 'count': count})
+            elif tag_id is not None:
+                facets['tags'].append({'id': tag_id, 'name': tag_name, 'count': count})
+        for key in ('status', 'category', 'tags'):
+            facets[key].sort(key=lambda f: -f['count'])
+        return facets
+
+    @staticmethod
+    def bulk_lookup(keys):
+        """
+        Resolve many templates at once. Each key is {'id'} or {'title', 'owner'}
+        (owner = username), optionally with a pinned 'version' number.
+
+        Returns one (template, version, error) tuple per key, in order, using
+        four queries whatever the number of keys: templates, their tags, the
+        current (DISTINCT ON) and pinned versions, and those versions' variants.
+        A (title, owner) pair matching several templates resolves to the most
+        recently updated one.
+        """
+        ids = {key['id'] for key in keys if 'id' in key}
+        titles = {key['title'] for key in keys if 'title' in key}
+        owners = {key['owner'] for key in keys if 'title' in key}
+        match = Q(pk__in=ids)
+        if titles:
+            match |= Q(title__in=titles, created_by__username__in=owners)
+        templates = (
+            PromptTemplate.objects
+            .defer('search_vector')
+            .filter(match)
+            .select_related('category', 'created_by')
+            .prefetch_related('tags')
+            .order_by('-updated_at')
+        )
+        by_id = {}
+        by_title = {}
+        for template in templates:
+            by_id[template.pk] = template
+            owner = template.created_by.username if template.created_by else None
+            by_title.setdefault((template.title, owner), template)
+
+        resolved = []
+        for key in keys:
+            if 'id' in key:
+                template = by_id.get(key['id'])
+            else:
+                template = by_title.get((key['title'], key['owner']))
+            resolved.append(template)
+
+        current_for = {t.pk for key, t in zip(keys, resolved) if t is not None and 'version' not in key}
+        pinned = {(t.pk, key['version']) for key, t in zip(keys, resolved) if t is not None and 'version' in key}
+        versions_by_key = {}
+        if current_for or pinned:
+            current = (
+                PromptVersion.objects
+                .filter(template_id__in=current_for)
+                .order_by('template_id', '-version_number')
+                .distinct('template_id')
+                .values('pk')
+            )
+            version_match = reduce(
+                operator.or_,
+                (Q(template_id=t, version_number=n) for t, n in pinned),
+                Q(pk__in=current),
+            )
+            versions = (
+                PromptVersion.objects
+                .filter(version_match)
+                .select_related('blob', 'created_by')
+                .prefetch_related(Prefetch('variants', queryset=PromptVariant.objects.select_related('blob', 'created_by')))
+                .order_by('template_id', '-version_number')
+            )
+            for version in versions:
+                # Highest number first, so the first seen per template is its current version
+                versions_by_key.setdefault((version.template_id, None), version)
+                versions_by_key[(version.template_id, version.version_number)] = version
+
+        results = []
+        for key, template in zip(keys, resolved):
+            if template is None:
+                results.append((None, None, 'Template not found.'))
+                continue
+            version = versions_by_key.get((template.pk, key.get('version')))
+            if version is None:
+                if 'version' in key:
+                    results.append((template, None, f"Version {key['version']} not found."))
+                else:
+                    results.append((template, None, 'This prompt has no versions yet.'))
+                continue
+            results.append((template, version, None))
+        return results
+
     @staticmethod
     def get_prompt_statistics():
         """
         Get statistics about prompts
         """
+        facets = PromptRepository.get_facet_counts(PromptTemplate.objects.all())
         return {
-            'total': PromptTemplate.objects.count(),
-            'by_status': dict(PromptTemplate.objects.values('status').annotate(count=Count('id')).values_list('status', 'count')),
-            'by_category': dict(PromptTemplate.objects.values('category').annotate(count=Count('id')).values_list('category', 'count')),
+            'total': facets['total'],
+            'by_status': {f['value']: f['count'] for f in facets['status']},
+            'by_category': {f['id']: f['count'] for f in facets['category']},
         }
@@ -2,8 +2,10 @@
 Serializers for prompts
 """
 import re
+from django.conf import settings
 from rest_framework import serializers
 from .models import Category, Tag, PromptTemplate, PromptVersion, PromptVariant, APIKey
+from .services.taxonomy_service import TaxonomyService
 
 
 class APIKeySerializer(serializers.ModelSerializer):
@@ -35,42 +37,82 @@ class TagSerializer(serializers.ModelSerializer):
 
 class PromptVariantSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    body = serializers.CharField(allow_blank=True)
 
     class Meta:
         model = PromptVariant
-        fields = ['id', 'name', 'body', 'variables', 'created_by', 'created_by_username', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'name', 'body', 'body_hash', 'variables', 'created_by', 'created_by_username', 'created_at']
+        read_only_fields = ['id', 'body_hash', 'created_at']
 
 
 class PromptVersionSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     variants = PromptVariantSerializer(many=True, read_only=True)
-    content = serializers.CharField(source='body')
+    content = serializers.CharField(source='body', allow_blank=True)
     change_notes = serializers.CharField(source='change_note', allow_blank=True, required=False)
 
     class Meta:
         model = PromptVersion
         fields = [
-            'id', 'version_number', 'content', 'variables', 'change_notes',
+            'id', 'version_number', 'content', 'body_hash', 'variables', 'change_notes',
             'created_by', 'created_by_username', 'created_at', 'variants'
         ]
-        read_only_fields = ['id', 'version_number', 'created_at']
+        read_only_fields = ['id', 'version_number', 'body_hash', 'created_at']
+
+
+class PromptVersionSummarySerializer(serializers.ModelSerializer):
+    """Version history entry without the body; fetch /versions/{id}/ for the full version."""
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    change_notes = serializers.CharField(source='change_note', read_only=True)
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+
+    class Meta:
+        model = PromptVersion
+        fields = [
+            'id', 'version_number', 'change_notes', 'size', 'body_hash',
+            'created_by', 'created_by_username', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class TagIdsField(serializers.Field):
+    """
+    Tag ids in and out. Input has already been resolved to existing ids by
+    TaxonomyService, so unlike a many PrimaryKeyRelatedField this does not
+    fetch each tag again to validate it.
+    """
+
+    def to_representation(self, value):
+        return [tag.pk for tag in value.all()]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (list, tuple)):
+            raise serializers.ValidationError('Expected a list of tag ids or names.')
+        return list(data)
 
 
 class PromptTemplateSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
+    tags = TagIdsField(required=False)
     tags_data = TagSerializer(source='tags', many=True, read_only=True)
     current_version_data = serializers.SerializerMethodField()
+    search_rank = serializers.SerializerMethodField()
+    search_headline = serializers.SerializerMethodField()
 
     class Meta:
         model = PromptTemplate
         fields = [
             'id', 'title', 'description', 'category', 'category_name',
             'tags', 'tags_data', 'status', 'created_by', 'created_by_username',
-            'created_at', 'updated_at', 'current_version_data'
+            'created_at', 'updated_at', 'current_version_data',
+            'execution_count', 'success_count', 'last_executed_at', 'total_cost',
+            'search_rank', 'search_headline'
+        ]
+        read_only_fields = [
+            'id', 'created_at', 'updated_at',
+            'execution_count', 'success_count', 'last_executed_at', 'total_cost',
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_current_version_data(self, obj):
         version = obj.current_version
@@ -78,44 +120,24 @@ class PromptTemplateSerializer(serializers.ModelSerializer):
             return PromptVersionSerializer(version).data
         return None
 
-    def _resolve_category_id(self, value):
-        """Return a Category pk integer from an ID or name string, or None."""
-        if value is None or value == '':
-            return None
-        try:
-            return int(value)  # already an ID
-        except (ValueError, TypeError):
-            pass
-        # treat as name
-        cat, _ = Category.objects.get_or_create(name=str(value).strip())
-        return cat.pk
-
-    def _resolve_tag_ids(self, values):
-        """Return a list of Tag pk integers from IDs or name strings."""
-        if not values:
-            return []
-        result = []
-        for v in values:
-            v_str = str(v).strip()
-            if not v_str:
-                continue
-            try:
-                result.append(int(v_str))
-            except (ValueError, TypeError):
-                tag, _ = Tag.objects.get_or_create(name=v_str)
-                result.append(tag.pk)
-        return result
+    def get_search_rank(self, obj):
+        """Only set when the list was filtered with ?search=."""
+        return getattr(obj, 'search_rank', None)
+
+    def get_search_headline(self, obj):
+        """Highlighted body snippet; only set when the list was filtered with ?search=."""
+        return getattr(obj, 'search_headline', None)
 
     def to_internal_value(self, data):
         """Resolve category/tags names before standard DRF validation."""
         data = data.copy() if hasattr(data, 'copy') else dict(data)
         if 'category' in data:
-            data['category'] = self._resolve_category_id(data['category'])
+            data['category'] = TaxonomyService.resolve_category(data['category'])
         if 'tags' in data:
             raw = data['tags']
             if isinstance(raw, str):
-                raw = [t.strip() for t in raw.split(',') if t.strip()]
-            data['tags'] = self._resolve_tag_ids(raw)
+                raw = raw.split(',')
+            data['tags'] = TaxonomyService.resolve_tags(raw)
         if 'status' in data and data['status']:
             data['status'] = str(data['status']).lower()
         return super().to_internal_value(data)
@@ -124,10 +146,91 @@ class PromptTemplateSerializer(serializers.ModelSerializer):
 
 
 class PromptTemplateDetailSerializer(PromptTemplateSerializer):
-    versions = PromptVersionSerializer(many=True, read_only=True)
+    """
+    Embeds the full current version plus body-less summaries of the most recent
+    versions; the rest of the history is paged via the template's `versions` action.
+    """
+    EMBEDDED_VERSIONS = 10
+
+    versions = serializers.SerializerMethodField()
+    versions_count = serializers.SerializerMethodField()
 
     class Meta(PromptTemplateSerializer.Meta):
-        fields = PromptTemplateSerializer.Meta.fields + ['versions']
+        fields = PromptTemplateSerializer.Meta.fields + ['versions', 'versions_count']
+
+    def get_versions(self, obj):
+        recent = (
+            obj.versions
+            .select_related('blob', 'created_by')
+            .order_by('-version_number')[:self.EMBEDDED_VERSIONS]
+        )
+        return PromptVersionSummarySerializer(recent, many=True).data
+
+    def get_versions_count(self, obj):
+        count = getattr(obj, 'versions_count', None)
+        return count if count is not None else obj.versions.count()
+
+
+class TemplateLookupKeySerializer(serializers.Serializer):
+    """One key of a bulk lookup: an id, or a title plus owner username."""
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(required=False)
+    owner = serializers.CharField(required=False)
+    version = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        if 'id' in attrs:
+            if 'title' in attrs or 'owner' in attrs:
+                raise serializers.ValidationError('Give either "id" or "title" and "owner", not both.')
+        elif 'title' not in attrs or 'owner' not in attrs:
+            raise serializers.ValidationError('Each key needs "id", or both "title" and "owner".')
+        return attrs
+
+
+class TemplateLookupSerializer(serializers.Serializer):
+    keys = serializers.ListField(
+        child=TemplateLookupKeySerializer(),
+        allow_empty=False,
+        max_length=settings.TEMPLATE_LOOKUP_MAX_KEYS,
+    )
+
+
+class TemplateBulkOperationSerializer(serializers.Serializer):
+    """
+    Target templates by `ids` or by `filter` (status, category, tag, search,
+    mine), then apply `operation`. `category` and `tags` accept ids or names.
+    """
+    OPERATIONS = ['archive', 'activate', 'set_category', 'add_tags', 'remove_tags', 'set_tags']
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filter = serializers.DictField(required=False)
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    category = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+
+    FILTER_KEYS = {'status', 'category', 'tag', 'search', 'mine'}
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Give exactly one of "ids" or "filter".')
+        unknown = set(attrs.get('filter', {})) - self.FILTER_KEYS
+        if unknown:
+            raise serializers.ValidationError({'filter': f"Unknown keys: {', '.join(sorted(unknown))}."})
+        if attrs['operation'] == 'set_category' and 'category' not in attrs:
+            raise serializers.ValidationError({'category': 'Required for set_category (null to clear).'})
+        if attrs['operation'] in ('add_tags', 'remove_tags', 'set_tags') and 'tags' not in attrs:
+            raise serializers.ValidationError({'tags': f"Required for {attrs['operation']}."})
+        return attrs
+
+
+class PromptTemplateLookupSerializer(PromptTemplateSerializer):
+    """Template fields for bulk lookup results; the resolved version is returned alongside."""
+
+    class Meta(PromptTemplateSerializer.Meta):
+        fields = [
+            f for f in PromptTemplateSerializer.Meta.fields
+            if f not in ('current_version_data', 'search_rank', 'search_headline')
+        ]
 
 
 class PromptTemplateCreateSerializer(serializers.ModelSerializer):
@@ -163,39 +266,6 @@ class PromptTemplateCreateSerializer(serializers.ModelSerializer):
         variables = [v.strip() for v in re.findall(pattern, content)]
         return list(set(variables))  # Remove duplicates
     
-    def _get_or_create_category(self, category_value):
-        """Get or create category from ID or name"""
-        if not category_value:
-            return None
-        
-        # Try as ID first
-        try:
-            category_id = int(category_value)
-            return Category.objects.get(id=category_id)
-        except (ValueError, Category.DoesNotExist):
-            # Treat as name
-            category, _ = Category.objects.get_or_create(name=category_value)
-            return category
-    
-    def _get_or_create_tags(self, tags_list):
-        """Get or create tags from IDs or names"""
-        if not tags_list:
-            return []
-        
-        tag_objects = []
-        for tag_value in tags_list:
-            # Try as ID first
-            try:
-                tag_id = int(tag_value)
-                tag = Tag.objects.get(id=tag_id)
-                tag_objects.append(tag)
-            except (ValueError, Tag.DoesNotExist):
-                # Treat as name
-                tag, _ = Tag.objects.get_or_create(name=tag_value)
-                tag_objects.append(tag)
-        
-        return tag_objects
-    
     def create(self, validated_data):
         # Extract custom fields
         category_value = validated_data.pop('category', None)
@@ -209,15 +279,13 @@ class PromptTemplateCreateSerializer(serializers.ModelSerializer):
             validated_data['status'] = status.lower()
         
         # Get or create category
-        category = self._get_or_create_category(category_value)
-        if category:
-            validated_data['category'] = category
+        validated_data['category_id'] = TaxonomyService.resolve_category(category_value)
         
         # Create template
         template = PromptTemplate.objects.create(**validated_data)
         
         # Handle tags
-        tags = self._get_or_create_tags(tags_list)
+        tags = TaxonomyService.resolve_tags(tags_list)
         if tags:
             template.tags.set(tags)
         
@@ -241,6 +309,7 @@ class PromptTemplateCreateSerializer(serializers.ModelSerializer):
 
 
 class PromptVersionCreateSerializer(serializers.ModelSerializer):
+    body = serializers.CharField(allow_blank=True)
     variables = serializers.ListField(
         child=serializers.CharField(),
         required=False,
@@ -268,6 +337,8 @@ class PromptVersionCreateSerializer(serializers.ModelSerializer):
 
 
 class PromptVariantCreateSerializer(serializers.ModelSerializer):
+    body = serializers.CharField(allow_blank=True)
+
     class Meta:
         model = PromptVariant
         fields = ['version', 'name', 'body', 'variables']
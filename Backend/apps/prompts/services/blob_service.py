@@ -0,0 +1,113 @@
+"""
+Service for delta-compressed storage of prompt bodies
+"""
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from apps.prompts.delta import delta_size, make_delta
+from apps.prompts.models import PromptBlob, PromptVersion
+
+
+class BlobService:
+    """
+    Keeps version history compact (reverse deltas, as RCS does):
+
+    - the current version of a template is always stored whole, so reads on
+      the hot path and the search-vector SQL never rebuild anything;
+    - when a version is superseded its blob is rewritten as a delta against
+      the new current blob, unless its version number is a multiple of
+      PROMPT_SNAPSHOT_INTERVAL (periodic full snapshot) or the delta would
+      not save enough space.
+
+    Deltas only ever point at blobs that are whole at that moment, and
+    materialising a blob drops its outgoing link, so chains cannot cycle and
+    are at most PROMPT_SNAPSHOT_INTERVAL long.
+    """
+
+    @staticmethod
+    def materialize(blob):
+        """Store a blob whole again (used when it becomes a current version)."""
+        if blob.body is not None:
+            return
+        text = blob.text
+        PromptBlob.objects.filter(hash=blob.hash).update(body=text, base=None, delta=None)
+        blob.body, blob.base_id, blob.delta = text, None, None
+
+    @staticmethod
+    def _is_current_elsewhere(blob_hash, template_id):
+        """True when the blob is the current version of some other template."""
+        newer = PromptVersion.objects.filter(
+            template_id=OuterRef('template_id'),
+            version_number__gt=OuterRef('version_number'),
+        )
+        return (
+            PromptVersion.objects
+            .filter(blob_id=blob_hash)
+            .exclude(template_id=template_id)
+            .filter(~Exists(newer))
+            .exists()
+        )
+
+    @staticmethod
+    def compact(version, newer_blob):
+        """Rewrite `version`'s blob as a delta against the (whole) `newer_blob` when worthwhile."""
+        blob = version.blob
+        if blob.hash == newer_blob.hash or blob.body is None or newer_blob.body is None:
+            return False
+        if version.version_number % settings.PROMPT_SNAPSHOT_INTERVAL == 0:
+            return False
+        if BlobService._is_current_elsewhere(blob.hash, version.template_id):
+            return False
+        ops = make_delta(newer_blob.body, blob.body)
+        if delta_size(ops) >= blob.size * settings.PROMPT_DELTA_MAX_RATIO:
+            return False
+        return bool(
+            PromptBlob.objects
+            .filter(hash=blob.hash, body__isnull=False)
+            .update(body=None, base=newer_blob, delta=ops)
+        )
+
+    @staticmethod
+    def on_version_created(version):
+        if not settings.PROMPT_DELTA_STORAGE:
+            return
+        BlobService.materialize(version.blob)
+        previous = (
+            PromptVersion.objects
+            .filter(template_id=version.template_id, version_number__lt=version.version_number)
+            .select_related('blob')
+            .order_by('-version_number')
+            .first()
+        )
+        if previous is not None:
+            BlobService.compact(previous, version.blob)
+
+    @staticmethod
+    def on_version_deleted(template_id):
+        """The previous version may have become current; make sure it is whole."""
+        current = (
+            PromptVersion.objects
+            .filter(template_id=template_id)
+            .select_related('blob')
+            .order_by('-version_number')
+            .first()
+        )
+        if current is not None:
+            BlobService.materialize(current.blob)
+
+    @staticmethod
+    def compact_template(template_id):
+        """Compact a whole existing history, oldest first. Returns the number of blobs rewritten."""
+        versions = list(
+            PromptVersion.objects
+            .filter(template_id=template_id)
+            .select_related('blob')
+            .order_by('version_number')
+        )
+        if not versions:
+            return 0
+        BlobService.materialize(versions[-1].blob)
+        rewritten = 0
+        for older, newer in zip(versions, versions[1:]):
+            newer.blob.refresh_from_db()
+            rewritten += BlobService.compact(older, newer.blob)
+        return rewritten
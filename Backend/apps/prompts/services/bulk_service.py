@@ -0,0 +1,114 @@
+"""
+Service for applying one operation to many templates
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from apps.audit.models import AuditLog
+from apps.prompts.models import PromptTemplate
+from apps.prompts.services.search_service import SearchService
+from apps.prompts.services.snapshot_service import SnapshotService
+from common.cache import bump_versions_many
+
+TemplateTag = PromptTemplate.tags.through
+
+
+class BulkTemplateService:
+    """
+    Set-based template updates: one UPDATE for status/category changes,
+    bulk insert/delete on the tag through table, and one bulk insert of audit
+    entries. None of these send model signals, so the derived data the
+    signals normally maintain (updated_at, cache namespaces, search vectors,
+    snapshot) is refreshed here once for the whole set.
+    """
+
+    OPERATIONS = ('archive', 'activate', 'set_category', 'add_tags', 'remove_tags', 'set_tags')
+
+    @staticmethod
+    def apply(queryset, operation, user, category_id=None, tag_ids=(), request_meta=None):
+        """
+        Apply `operation` to the templates in `queryset`. Returns counts:
+        matched, updated (templates whose row or tags changed), and for tag
+        operations tags_added / tags_removed (links).
+        """
+        request_meta = request_meta or {}
+        rows = {row['id']: row for row in queryset.order_by().values('id', 'title', 'status', 'category_id')}
+        result = {'operation': operation, 'matched': len(rows), 'updated': 0}
+        if not rows:
+            return result
+        now = timezone.now()
+
+        with transaction.atomic():
+            if operation in ('archive', 'activate'):
+                field = 'status'
+                value = PromptTemplate.STATUS_ARCHIVED if operation == 'archive' else PromptTemplate.STATUS_ACTIVE
+                changed = [pk for pk, row in rows.items() if row['status'] != value]
+            elif operation == 'set_category':
+                field, value = 'category_id', category_id
+                changed = [pk for pk, row in rows.items() if row['category_id'] != value]
+            else:
+                field = value = None
+                changed = BulkTemplateService._apply_tags(operation, list(rows), set(tag_ids), result)
+
+            if field:
+                PromptTemplate.objects.filter(pk__in=changed).update(**{field: value, 'updated_at': now})
+            elif changed:
+                PromptTemplate.objects.filter(pk__in=changed).update(updated_at=now)
+            result['updated'] = len(changed)
+
+            content_type = ContentType.objects.get_for_model(PromptTemplate)
+            action = AuditLog.ACTION_ARCHIVE if operation == 'archive' else AuditLog.ACTION_UPDATE
+            AuditLog.objects.bulk_create([
+                AuditLog(
+                    user=user,
+                    content_type=content_type,
+                    object_id=pk,
+                    object_repr=rows[pk]['title'][:500],
+                    action=action,
+                    changes={field: {'old': rows[pk][field], 'new': value}} if field else {'tags': {operation: sorted(tag_ids)}},
+                    extra={'model': 'PromptTemplate', 'bulk_operation': operation},
+                    ip_address=request_meta.get('ip_address'),
+                    user_agent=request_meta.get('user_agent', ''),
+                )
+                for pk in changed
+            ], batch_size=1000)
+
+            if changed:
+                transaction.on_commit(lambda: BulkTemplateService._after_commit(operation, changed))
+        return result
+
+    @staticmethod
+    def _apply_tags(operation, template_ids, tag_ids, result):
+        existing = set(
+            TemplateTag.objects
+            .filter(prompttemplate_id__in=template_ids)
+            .values_list('prompttemplate_id', 'tag_id')
+        )
+        wanted = {(t, tag) for t in template_ids for tag in tag_ids}
+        if operation == 'add_tags':
+            to_add, to_remove = wanted - existing, set()
+        elif operation == 'remove_tags':
+            to_add, to_remove = set(), existing & wanted
+        else:  # set_tags
+            to_add, to_remove = wanted - existing, existing - wanted
+        if to_add:
+            TemplateTag.objects.bulk_create(
+                [TemplateTag(prompttemplate_id=t, tag_id=tag) for t, tag in to_add],
+                ignore_conflicts=True, batch_size=1000,
+            )
+        if to_remove:
+            links = TemplateTag.objects.filter(prompttemplate_id__in=template_ids)
+            if operation == 'remove_tags':
+                links.filter(tag_id__in=tag_ids).delete()
+            else:
+                links.exclude(tag_id__in=tag_ids).delete()
+        result['tags_added'] = len(to_add)
+        result['tags_removed'] = len(to_remove)
+        return sorted({t for t, _ in to_add | to_remove})
+
+    @staticmethod
+    def _after_commit(operation, template_ids):
+        bump_versions_many(['templates', *(f'template:{pk}' for pk in template_ids)])
+        if operation in ('add_tags', 'remove_tags', 'set_tags'):
+            SearchService.update_search_vectors(template_ids)
+        SnapshotService.schedule_rebuild()
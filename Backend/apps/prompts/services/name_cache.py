@@ -0,0 +1,69 @@
+"""
+In-process name -> id caches for tags and categories
+"""
+import threading
+import time
+from django.conf import settings
+from apps.prompts.models import Category, Tag
+
+
+class NameIdCache:
+    """
+    Lazily filled name -> pk map for a model with a unique `name` column.
+
+    Entries are added as names are resolved or created, dropped by the
+    post_save/post_delete handlers in this process, and the whole map is
+    discarded after `ttl` seconds so renames/deletes made by other workers
+    are picked up within a bounded delay.
+    """
+
+    def __init__(self, model, ttl=None):
+        self.model = model
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._loaded_at = time.monotonic()
+
+    def _expire(self):
+        ttl = self.ttl if self.ttl is not None else settings.NAME_CACHE_TTL
+        if time.monotonic() - self._loaded_at > ttl:
+            with self._lock:
+                self._ids = {}
+                self._loaded_at = time.monotonic()
+
+    def get(self, name):
+        self._expire()
+        return self._ids.get(name)
+
+    def get_many(self, names):
+        """Return {name: pk} for every name that exists, querying only for misses."""
+        self._expire()
+        found = {}
+        missing = []
+        for name in names:
+            pk = self._ids.get(name)
+            if pk is None:
+                missing.append(name)
+            else:
+                found[name] = pk
+        if missing:
+            rows = dict(self.model.objects.filter(name__in=missing).values_list('name', 'id'))
+            self._ids.update(rows)
+            found.update(rows)
+        return found
+
+    def set(self, name, pk):
+        self._ids[name] = pk
+
+    def discard(self, pk):
+        with self._lock:
+            self._ids = {name: i for name, i in self._ids.items() if i != pk}
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+            self._loaded_at = time.monotonic()
+
+
+tag_ids = NameIdCache(Tag)
+category_ids = NameIdCache(Category)
@@ -0,0 +1,124 @@
+"""
+Service for full-text search and typeahead over prompt templates
+"""
+import re
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db.models import BooleanField, Case, CharField, F, OuterRef, Q, Subquery, Value, When
+from apps.prompts.models import Category, PromptTemplate, PromptVersion, Tag
+
+
+# Text search configuration used for the vector, the query and the headline.
+# Must match the configuration used by the backfill in migration 0003.
+SEARCH_CONFIG = 'english'
+
+
+class SearchService:
+    """
+    Maintains PromptTemplate.search_vector and runs ranked searches against it
+    """
+
+    @staticmethod
+    def _current_body():
+        return Subquery(
+            PromptVersion.objects
+            .filter(template=OuterRef('pk'))
+            .order_by('-version_number')
+            .values('blob__body')[:1]
+        )
+
+    @staticmethod
+    def _tag_names():
+        return Subquery(
+            Tag.objects
+            .filter(templates=OuterRef('pk'))
+            .values('templates')
+            .annotate(names=StringAgg('name', delimiter=' '))
+            .values('names')[:1]
+        )
+
+    @staticmethod
+    def update_search_vectors(template_ids):
+        """
+        Recompute the search vector of the given templates in one UPDATE.
+        Weights: title A, description B, tags C, current version body D.
+        """
+        if not template_ids:
+            return 0
+        vector = (
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(SearchService._tag_names(), weight='C', config=SEARCH_CONFIG)
+            + SearchVector(SearchService._current_body(), weight='D', config=SEARCH_CONFIG)
+        )
+        return PromptTemplate.objects.filter(id__in=template_ids).update(search_vector=vector)
+
+    @staticmethod
+    def build_query(text):
+        return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+    @staticmethod
+    def search(queryset, text):
+        """
+        Filter a PromptTemplate queryset by a websearch-style query, ranked best first.
+        Each row is annotated with `search_rank` and a highlighted `search_headline`
+        taken from the current version body.
+        """
+        query = SearchService.build_query(text)
+        return (
+            queryset
+            .filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F('search_vector'), query),
+                search_headline=SearchHeadline(
+                    SearchService._current_body(), query,
+                    config=SEARCH_CONFIG,
+                    start_sel='<mark>', stop_sel='</mark>',
+                    max_fragments=2,
+                ),
+            )
+            .order_by('-search_rank', '-updated_at')
+        )
+
+    # kind -> (model, label field)
+    TYPEAHEAD_SOURCES = {
+        'tag': (Tag, 'name'),
+        'category': (Category, 'name'),
+        'template': (PromptTemplate, 'title'),
+    }
+
+    @staticmethod
+    def typeahead(text, kinds=None, limit=10):
+        """
+        Prefix and fuzzy matches for tags, categories and template titles in one
+        UNION query. Both predicates (`~*` anchored regex and `<%` word similarity)
+        are served by the gin_trgm_ops indexes. Prefix hits sort first, then by
+        similarity.
+        """
+        kinds = [k for k in (kinds or SearchService.TYPEAHEAD_SOURCES) if k in SearchService.TYPEAHEAD_SOURCES]
+        prefix = r'^' + re.escape(text)
+        parts = []
+        for kind in kinds:
+            model, field = SearchService.TYPEAHEAD_SOURCES[kind]
+            parts.append(
+                model.objects
+                .filter(Q(**{f'{field}__iregex': prefix}) | Q(**{f'{field}__trigram_word_similar': text}))
+                .annotate(
+                    kind=Value(kind, output_field=CharField()),
+                    label=F(field),
+                    is_prefix=Case(
+                        When(**{f'{field}__iregex': prefix}, then=Value(True)),
+                        default=Value(False),
+                        output_field=BooleanField(),
+                    ),
+                    similarity=TrigramWordSimilarity(text, field),
+                )
+                .values('id', 'kind', 'label', 'is_prefix', 'similarity')
+                .order_by('-is_prefix', '-similarity')[:limit]
+            )
+        if not parts:
+            return []
+        query = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+        return list(query.order_by('-is_prefix', '-similarity', 'label')[:limit])
@@ -0,0 +1,192 @@
+"""
+Service for building the memory-mappable catalog snapshot
+"""
+import fcntl
+import logging
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from apps.prompts.models import PromptTemplate, PromptVersion, Tag
+from apps.prompts.services.template_registry import PLACEHOLDER_RE
+from apps.prompts.snapshot import PromptSnapshot, SnapshotError, encode_entry, write_snapshot
+from common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+REBUILD_PENDING_KEY = 'prompt-snapshot-rebuild-pending'
+
+
+class SnapshotService:
+    """
+    Compiles active templates and their current versions into the snapshot
+    format in apps/prompts/snapshot.py.
+
+    Every host keeps its own file. After template writes, the rebuild task
+    broadcasts a request on PROMPT_SNAPSHOT_CHANNEL and refreshes its own
+    host; `manage.py sync_prompt_snapshot`, run once on every other host
+    that reads the file, listens for those requests and refreshes there.
+    """
+
+    @staticmethod
+    def compile_entries(template_ids=None):
+        """{template_id: encoded entry} for active templates (all, or just `template_ids`)."""
+        templates = (
+            PromptTemplate.objects
+            .filter(status=PromptTemplate.STATUS_ACTIVE)
+            .only('id', 'title')
+            .prefetch_related(Prefetch('tags', queryset=Tag.objects.only('id', 'name')))
+        )
+        if template_ids is not None:
+            templates = templates.filter(pk__in=template_ids)
+        templates = {t.pk: t for t in templates}
+        current = (
+            PromptVersion.objects
+            .filter(template_id__in=list(templates))
+            .select_related('blob')
+            .order_by('template_id', '-version_number')
+            .distinct('template_id')
+        )
+        entries = {}
+        for version in current:
+            template = templates[version.template_id]
+            body = version.body
+            entries[template.pk] = encode_entry({
+                'template_id': template.pk,
+                'title': template.title,
+                'tags': sorted(tag.name for tag in template.tags.all()),
+                'version_id': version.pk,
+                'version_number': version.version_number,
+                'body_hash': version.blob_id,
+                'body': body,
+                'variables': version.variables,
+                'segments': PLACEHOLDER_RE.split(body),
+            })
+        return entries
+
+    @staticmethod
+    def build(path=None, incremental=False):
+        """
+        Write the snapshot. Incremental builds re-encode only templates updated
+        since the previous snapshot (version, variant and tag changes move
+        updated_at, see signals) and copy every other entry's bytes across
+        unread. Returns (entries written, entries recompiled).
+        """
+        path = path or settings.PROMPT_SNAPSHOT_PATH
+        built_at = timezone.now()
+        previous = None
+        if incremental and os.path.exists(path):
+            try:
+                previous = PromptSnapshot(path)
+            except SnapshotError:
+                previous = None
+        try:
+            if previous is None:
+                entries = SnapshotService.compile_entries()
+                write_snapshot(path, entries, built_at.timestamp())
+                return len(entries), len(entries)
+            since = datetime.fromtimestamp(previous.built_at, tz=dt_timezone.utc)
+            active_ids = set(
+                PromptTemplate.objects
+                .filter(status=PromptTemplate.STATUS_ACTIVE)
+                .values_list('id', flat=True)
+            )
+            changed_ids = set(
+                PromptTemplate.objects
+                .filter(updated_at__gte=since, pk__in=active_ids)
+                .values_list('id', flat=True)
+            )
+            # Active templates missing from the old file (e.g. re-activated) are compiled too
+            kept = {}
+            for template_id in previous.ids():
+                if template_id in active_ids and template_id not in changed_ids:
+                    kept[template_id] = previous.raw(template_id)
+            recompile = changed_ids | (active_ids - set(kept))
+            kept.update(SnapshotService.compile_entries(recompile))
+            write_snapshot(path, kept, built_at.timestamp())
+            return len(kept), len(recompile)
+        finally:
+            if previous is not None:
+                previous.close()
+
+    @staticmethod
+    def schedule_rebuild():
+        """
+        Queue one incremental rebuild after the current transaction commits;
+        writes within PROMPT_SNAPSHOT_DEBOUNCE seconds share it.
+        """
+        if not settings.PROMPT_SNAPSHOT_PATH:
+            return
+
+        def enqueue():
+            if cache.add(REBUILD_PENDING_KEY, 1, settings.PROMPT_SNAPSHOT_DEBOUNCE * 2):
+                from apps.prompts.tasks import rebuild_prompt_snapshot
+                rebuild_prompt_snapshot.apply_async(countdown=settings.PROMPT_SNAPSHOT_DEBOUNCE)
+
+        transaction.on_commit(enqueue)
+
+    @staticmethod
+    def refresh(requested_at, path=None):
+        """
+        Bring this host's snapshot up to date with every change committed
+        before `requested_at` (epoch seconds). Processes on one host take turns
+        on a lock file, and skip the build when the file was already built
+        after `requested_at`. Returns build()'s result, or None when skipped.
+        """
+        path = path or settings.PROMPT_SNAPSHOT_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(f'{path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if _built_at(path) >= requested_at:
+                    return None
+                return SnapshotService.build(path, incremental=True)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def broadcast_rebuild(requested_at):
+        """Ask every host running sync_prompt_snapshot to refresh its file."""
+        try:
+            get_redis().publish(settings.PROMPT_SNAPSHOT_CHANNEL, repr(requested_at))
+        except Exception:
+            logger.warning('Could not broadcast prompt snapshot rebuild', exc_info=True)
+
+    @staticmethod
+    def listen():
+        """Refresh this host's snapshot on every broadcast request; runs until interrupted."""
+        backoff = 1
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.PROMPT_SNAPSHOT_CHANNEL)
+                # Requests published while we were disconnected are lost
+                SnapshotService.refresh(time.time())
+                backoff = 1
+                for message in pubsub.listen():
+                    try:
+                        requested_at = float(message['data'])
+                    except (TypeError, ValueError):
+                        continue
+                    SnapshotService.refresh(requested_at)
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                logger.warning('Prompt snapshot listener failed; retrying in %ss', backoff, exc_info=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+def _built_at(path):
+    try:
+        snapshot = PromptSnapshot(path)
+    except (OSError, SnapshotError):
+        return 0
+    try:
+        return snapshot.built_at
+    finally:
+        snapshot.close()
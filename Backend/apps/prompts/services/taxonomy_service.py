@@ -0,0 +1,73 @@
+"""
+Service for resolving tag and category references in bulk
+"""
+from apps.prompts.models import Category, Tag
+from apps.prompts.services.name_cache import category_ids, tag_ids
+from common.cache import bump_version
+from common.params import parse_id
+
+
+class TaxonomyService:
+    """
+    Turns mixed lists of ids and names into primary keys with a fixed number
+    of queries, creating missing names: names are looked up with one
+    filter(name__in=...) (skipped for names already in the name cache),
+    missing ones inserted with one bulk_create(ignore_conflicts=True), and
+    then re-selected once, which also picks up rows a concurrent request
+    created first. Cached ids are trusted until the cache's TTL; a row
+    deleted by another worker in the meantime surfaces as a foreign key
+    violation on write, after which clear_caches() forces a fresh lookup.
+
+    A numeric value is an id if that row exists, otherwise it is a name.
+    """
+
+    CACHES = {Tag: (tag_ids, 'tags'), Category: (category_ids, 'categories')}
+
+    @staticmethod
+    def resolve_names(model, names):
+        """{name: pk} for every name, creating the missing ones."""
+        names = set(names)
+        if not names:
+            return {}
+        name_cache, namespace = TaxonomyService.CACHES[model]
+        found = name_cache.get_many(names)
+        missing = names - set(found)
+        if missing:
+            # bulk_create sends no post_save, so caches are updated here
+            model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+            created = dict(model.objects.filter(name__in=missing).values_list('name', 'id'))
+            for name, pk in created.items():
+                name_cache.set(name, pk)
+            found.update(created)
+            bump_version(namespace, 'taxonomy')
+        return found
+
+    @staticmethod
+    def clear_caches():
+        for name_cache, _ in TaxonomyService.CACHES.values():
+            name_cache.clear()
+
+    @staticmethod
+    def resolve(model, values):
+        """Primary keys for `values` (ids or names), de-duplicated, in input order."""
+        cleaned = [str(v).strip() for v in values or [] if v is not None and str(v).strip()]
+        numeric = {parse_id(v) for v in cleaned} - {None}
+        existing = set(model.objects.filter(pk__in=numeric).values_list('pk', flat=True)) if numeric else set()
+        names = [v for v in cleaned if parse_id(v) not in existing]
+        by_name = TaxonomyService.resolve_names(model, names)
+        result = []
+        for v in cleaned:
+            pk = parse_id(v) if parse_id(v) in existing else by_name[v]
+            if pk not in result:
+                result.append(pk)
+        return result
+
+    @staticmethod
+    def resolve_tags(values):
+        return TaxonomyService.resolve(Tag, values)
+
+    @staticmethod
+    def resolve_category(value):
+        """Category pk from an id or name, or None for an empty value."""
+        resolved = TaxonomyService.resolve(Category, [value])
+        return resolved[0] if resolved else None
@@ -0,0 +1,168 @@
+"""
+In-process registry of current template versions for the execution hot path
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from apps.prompts.models import PromptTemplate, PromptVersion
+from common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_RE = re.compile(r'\{\{([^{}]+)\}\}')
+
+
+class CompiledTemplate:
+    """
+    The current version of a template with its body pre-split into literal
+    and placeholder segments, so rendering is a single join.
+    """
+
+    def __init__(self, version):
+        self.version = version  # with .template and .blob loaded
+        self.template_id = version.template_id
+        self.body = version.body
+        self.variables = version.variables
+        # Even indexes are literal text, odd indexes placeholder names
+        self.segments = PLACEHOLDER_RE.split(self.body)
+        self.loaded_at = time.monotonic()
+
+    def render(self, values):
+        """Substitute {{name}} placeholders; names without a value are left as written."""
+        values = values or {}
+        parts = []
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                parts.append(segment)
+            elif segment in values:
+                parts.append(str(values[segment]))
+            else:
+                parts.append('{{%s}}' % segment)
+        return ''.join(parts)
+
+
+class TemplateRegistry:
+    """
+    LRU of template id -> CompiledTemplate, one per process (gunicorn or
+    Celery worker).
+
+    Writes publish the template id on a Redis channel; every process runs a
+    listener thread that evicts the id as soon as the message arrives. If
+    Redis is unreachable, or the listener is reconnecting, entries still
+    expire after TEMPLATE_REGISTRY_TTL seconds, which bounds staleness.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0  # bumped on every eviction
+        self._listener_pid = None
+
+    # -- lookups --
+
+    def get(self, template_id):
+        """
+        Return the CompiledTemplate for a template, or None when it has no
+        versions yet. Raises PromptTemplate.DoesNotExist for unknown ids.
+        """
+        self._ensure_listener()
+        template_id = int(template_id)
+        ttl = self.ttl if self.ttl is not None else settings.TEMPLATE_REGISTRY_TTL
+        with self._lock:
+            entry = self._entries.get(template_id)
+            if entry is not None and time.monotonic() - entry.loaded_at < ttl:
+                self._entries.move_to_end(template_id)
+                return entry
+            generation = self._generation
+        entry = self._load(template_id)
+        if entry is not None:
+            self._store(template_id, entry, generation)
+        return entry
+
+    def _load(self, template_id):
+        version = (
+            PromptVersion.objects
+            .filter(template_id=template_id)
+            .select_related('template', 'blob')
+            .order_by('-version_number')
+            .first()
+        )
+        if version is None:
+            if not PromptTemplate.objects.filter(pk=template_id).exists():
+                raise PromptTemplate.DoesNotExist(f'Prompt {template_id} not found.')
+            return None
+        return CompiledTemplate(version)
+
+    def _store(self, template_id, entry, generation):
+        max_size = self.max_size if self.max_size is not None else settings.TEMPLATE_REGISTRY_SIZE
+        with self._lock:
+            if generation != self._generation:
+                return  # an invalidation arrived while loading; the row may be stale
+            self._entries[template_id] = entry
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    # -- invalidation --
+
+    def evict(self, template_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(int(template_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def invalidate(self, template_id):
+        """Evict a template in every process once the current transaction commits."""
+        transaction.on_commit(lambda: self._publish(template_id))
+
+    def _publish(self, template_id):
+        self.evict(template_id)
+        try:
+            get_redis().publish(settings.TEMPLATE_REGISTRY_CHANNEL, str(template_id))
+        except Exception:
+            logger.warning('Could not publish template registry invalidation for %s', template_id, exc_info=True)
+
+    def _ensure_listener(self):
+        # Started lazily, and again after a fork (e.g. gunicorn --preload)
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            self._listener_pid = pid
+            self._entries.clear()
+        threading.Thread(target=self._listen, name='template-registry', daemon=True).start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.TEMPLATE_REGISTRY_CHANNEL)
+                # Messages published while we were disconnected are lost
+                self.clear()
+                backoff = 1
+                for message in pubsub.listen():
+                    try:
+                        self.evict(message['data'])
+                    except (TypeError, ValueError):
+                        continue
+            except Exception:
+                logger.warning('Template registry listener disconnected; retrying in %ss', backoff, exc_info=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+registry = TemplateRegistry()
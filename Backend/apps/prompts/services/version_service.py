@@ -1,6 +1,9 @@
 """
 Service for managing prompt versions
 """
+from django.conf import settings
+from django.core.cache import cache
+from apps.prompts import delta
 from apps.prompts.models import PromptVersion
 from common.exceptions import InvalidPromptVersionError
 
@@ -19,22 +22,16 @@ class VersionService:
         latest_version = prompt.versions.order_by('-version_number').first()
         next_version = (latest_version.version_number + 1) if latest_version else 1
 
-        # Create new version
+        # Create new version; the body is stored (once) in PromptBlob
         version = PromptVersion.objects.create(
-            prompt=prompt,
+            template=prompt,
             version_number=next_version,
-            content=data['content'],
+            body=data['content'],
             variables=data.get('variables', []),
-            model_config=data.get('model_config', {}),
-            change_notes=data.get('change_notes', ''),
+            change_note=data.get('change_notes', ''),
             created_by=user,
-            updated_by=user
         )
-
-        # Update current version
-        prompt.current_version = version
-        prompt.updated_by = user
-        prompt.save()
+        prompt.save(update_fields=['updated_at'])
 
         return version
 
@@ -44,7 +41,7 @@ class VersionService:
         Get a specific version of a prompt
         """
         try:
-            return PromptVersion.objects.get(prompt=prompt, version_number=version_number)
+            return PromptVersion.objects.select_related('blob').get(template=prompt, version_number=version_number)
         except PromptVersion.DoesNotExist:
             raise InvalidPromptVersionError(f"Version {version_number} not found")
 
@@ -55,38 +52,68 @@ class VersionService:
         """
         return prompt.versions.all()
 
+    @staticmethod
+    def body_changed(version, other):
+        """
+        True when two versions have different bodies — a hash comparison, no body reads
+        """
+        return version.body_hash != other.body_hash
+
     @staticmethod
     def rollback_to_version(prompt, version_number, user):
         """
-        Rollback to a specific version
+        Rollback to a specific version.
+        The new version points at the old version's blob, so no body is copied.
         """
         version = VersionService.get_version(prompt, version_number)
-        
-        # Create a new version with the old content
+
         latest_version = prompt.versions.order_by('-version_number').first()
         new_version_number = latest_version.version_number + 1
 
         new_version = PromptVersion.objects.create(
-            prompt=prompt,
+            template=prompt,
             version_number=new_version_number,
-            content=version.content,
+            blob_id=version.blob_id,
             variables=version.variables,
-            model_config=version.model_config,
-            change_notes=f"Rolled back to version {version_number}",
+            change_note=f"Rolled back to version {version_number}",
             created_by=user,
-            updated_by=user
         )
-
-        prompt.current_version = new_version
-        prompt.updated_by = user
-        prompt.save()
+        prompt.save(update_fields=['updated_at'])
 
         return new_version
 
+    @staticmethod
+    def diff(old_version, new_version):
+        """
+        Line and word diff between two versions. When the old body is stored as
+        a delta against the new one (adjacent versions) the line diff is read
+        straight off the stored ops. Cached per blob pair, since bodies never
+        change for a given hash.
+        """
+        cache_key = f"prompt-diff:{old_version.blob_id}:{new_version.blob_id}"
+        result = cache.get(cache_key)
+        if result is not None:
+            return result
+        old_blob = old_version.blob
+        if old_version.blob_id == new_version.blob_id:
+            hunks = delta.line_diff(new_version.body, new_version.body)
+        elif old_blob.body is None and old_blob.base_id == new_version.blob_id:
+            hunks = delta.line_diff_from_delta(new_version.body, old_blob.delta)
+        else:
+            hunks = delta.line_diff(old_version.body, new_version.body)
+        result = {
+            'identical': not VersionService.body_changed(old_version, new_version),
+            'stats': delta.diff_stats(hunks),
+            'lines': hunks,
+            'words': delta.word_diff(hunks),
+        }
+        cache.set(cache_key, result, settings.PROMPT_BLOB_CACHE_TTL)
+        return result
+
     @staticmethod
     def compare_versions(prompt, version1_number, version2_number):
         """
-        Compare two versions of a prompt
+        Compare two versions of a prompt (version1 -> version2)
         """
         version1 = VersionService.get_version(prompt, version1_number)
         version2 = VersionService.get_version(prompt, version2_number)
@@ -94,14 +121,15 @@ class VersionService:
         return {
             'version1': {
                 'number': version1.version_number,
-                'content': version1.content,
+                'body_hash': version1.body_hash,
                 'variables': version1.variables,
                 'created_at': version1.created_at,
             },
             'version2': {
                 'number': version2.version_number,
-                'content': version2.content,
+                'body_hash': version2.body_hash,
                 'variables': version2.variables,
                 'created_at': version2.created_at,
             },
+            **VersionService.diff(version1, version2),
         }
@@ -0,0 +1,181 @@
+"""
+Signal handlers keeping derived prompt data (blob storage, search vectors,
+name caches, conditional-GET validators, cached responses, template
+registry) in sync
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from common.cache import bump_version
+from .authentication import APIKeyAuthentication
+from .models import APIKey, Category, Tag, PromptTemplate, PromptVersion, PromptVariant
+from .services.blob_service import BlobService
+from .services.name_cache import category_ids, tag_ids
+from .services.search_service import SearchService
+from .services.snapshot_service import SnapshotService
+from .services.template_registry import registry
+
+
+# Registered first: the search vector below reads the current body from SQL,
+# which needs it stored whole.
+@receiver(post_save, sender=PromptVersion)
+def compact_superseded_version(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    BlobService.on_version_created(instance)
+
+
+@receiver(post_delete, sender=PromptVersion)
+def materialize_current_version(sender, instance, **kwargs):
+    BlobService.on_version_deleted(instance.template_id)
+
+
+@receiver(post_save, sender=PromptTemplate)
+def refresh_template_search_vector(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    SearchService.update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=PromptVersion)
+@receiver(post_delete, sender=PromptVersion)
+def refresh_version_search_vector(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    SearchService.update_search_vectors([instance.template_id])
+
+
+@receiver(m2m_changed, sender=PromptTemplate.tags.through)
+def refresh_tagged_search_vector(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance is a Tag; pk_set holds template ids (None on clear)
+        template_ids = pk_set if pk_set is not None else instance.templates.values_list('id', flat=True)
+    else:
+        template_ids = [instance.pk]
+    SearchService.update_search_vectors(list(template_ids))
+
+
+@receiver(post_save, sender=Tag)
+def refresh_renamed_tag_search_vector(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    SearchService.update_search_vectors(list(instance.templates.values_list('id', flat=True)))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def refresh_name_cache(sender, instance, created, **kwargs):
+    cache = tag_ids if sender is Tag else category_ids
+    if not created:
+        cache.discard(instance.pk)  # may have been renamed
+    cache.set(instance.name, instance.pk)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def evict_name_cache(sender, instance, **kwargs):
+    cache = tag_ids if sender is Tag else category_ids
+    cache.discard(instance.pk)
+
+
+# Conditional GET and response cache: a template's updated_at is its
+# validator and `template:<id>` / `templates` namespace its cached responses,
+# so anything that changes its representation moves both forward.
+# Namespaces are bumped once the write commits: bumped earlier, a concurrent
+# reader could cache pre-commit data under the new version until the TTL.
+def bump_after_commit(*namespaces):
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+def templates_changed(template_ids):
+    template_ids = [pk for pk in template_ids if pk is not None]
+    if not template_ids:
+        return
+    PromptTemplate.objects.filter(pk__in=template_ids).update(updated_at=timezone.now())
+    bump_after_commit('templates', *(f'template:{pk}' for pk in template_ids))
+    SnapshotService.schedule_rebuild()
+
+
+@receiver(post_save, sender=PromptTemplate)
+@receiver(post_delete, sender=PromptTemplate)
+def bump_template_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_after_commit('templates', f'template:{instance.pk}')
+    SnapshotService.schedule_rebuild()
+
+
+@receiver(post_save, sender=PromptVersion)
+@receiver(post_delete, sender=PromptVersion)
+def touch_version_template(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    templates_changed([instance.template_id])
+
+
+@receiver(post_save, sender=PromptVariant)
+@receiver(post_delete, sender=PromptVariant)
+def touch_variant_template(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    templates_changed(
+        PromptVersion.objects.filter(pk=instance.version_id).values_list('template_id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=PromptTemplate.tags.through)
+def touch_tagged_template(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        templates_changed([instance.pk])
+    elif pk_set is not None:
+        templates_changed(pk_set)
+    else:
+        # Tag cleared; its templates are no longer linked, so no rows to find
+        bump_after_commit('taxonomy')
+
+
+@receiver(post_save, sender=Tag)
+def touch_renamed_tag_templates(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    templates_changed(list(instance.templates.values_list('id', flat=True)))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tag_cache(sender, **kwargs):
+    # Tag names are embedded in template responses
+    bump_after_commit('tags', 'taxonomy')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_cache(sender, **kwargs):
+    bump_after_commit('categories', 'taxonomy')
+
+
+# Executions read current versions from the in-process template registry
+@receiver(post_save, sender=PromptTemplate)
+@receiver(post_delete, sender=PromptTemplate)
+def invalidate_registered_template(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registry.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=PromptVersion)
+@receiver(post_delete, sender=PromptVersion)
+def invalidate_registered_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registry.invalidate(instance.template_id)
+
+
+@receiver(post_delete, sender=APIKey)
+def evict_deleted_api_key(sender, instance, **kwargs):
+    APIKeyAuthentication.invalidate(instance.key_hash)
@@ -0,0 +1,182 @@
+"""
+Memory-mappable catalog snapshot: the current version of every active
+template in one file, readable with no database or network access.
+
+Layout (little-endian):
+
+    header   magic "PLSNAP01", format u32, entry count u32,
+             built_at u64 (µs since epoch), index offset u64
+    entries  one compact JSON object per template, back to back
+    index    (template id u64, offset u64, length u32) per entry, sorted by id
+
+Readers binary-search the index in the mapping and decode only the entry
+they need. This module has no Django dependency so services can import it
+on its own; the writer side lives in services/snapshot_service.py.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b'PLSNAP01'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIQQ')
+INDEX_ENTRY = struct.Struct('<QQI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def encode_entry(entry):
+    return json.dumps(entry, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def write_snapshot(path, entries, built_at):
+    """
+    Write {template_id: encoded entry bytes} to `path` atomically: readers
+    holding the old file keep their mapping, new opens see the new file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\0' * HEADER.size)
+            index = []
+            offset = HEADER.size
+            for template_id in sorted(entries):
+                data = entries[template_id]
+                f.write(data)
+                index.append((template_id, offset, len(data)))
+                offset += len(data)
+            for row in index:
+                f.write(INDEX_ENTRY.pack(*row))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index), int(built_at * 1_000_000), offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class PromptSnapshot:
+    """
+    Read-only view over a snapshot file. Every process mapping the same file
+    shares its pages through the OS page cache.
+
+        snapshot = PromptSnapshot('/var/lib/prompt-library/catalog.snap')
+        snapshot.render(12, {'topic': 'caching'})
+
+    Call reload_if_changed() periodically to pick up a rebuilt file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._open()
+
+    def _open(self):
+        f = open(self.path, 'rb')
+        try:
+            stat = os.fstat(f.fileno())
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        magic, fmt, count, built_at, index_offset = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            mapping.close()
+            f.close()
+            raise SnapshotError(f'{self.path} is not a format {FORMAT_VERSION} prompt snapshot')
+        self.close()
+        self._file, self._map = f, mapping
+        self._identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        self.count = count
+        self.built_at = built_at / 1_000_000
+        self._index_offset = index_offset
+
+    def reload_if_changed(self):
+        """Re-map the file if it was replaced since it was opened. Returns True if so."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_dev, stat.st_ino, stat.st_mtime_ns) == self._identity:
+            return False
+        self._open()
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _index_row(self, i):
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * INDEX_ENTRY.size)
+
+    def _locate(self, template_id):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = self._index_row(mid)
+            if row[0] < template_id:
+                lo = mid + 1
+            elif row[0] > template_id:
+                hi = mid
+            else:
+                return row
+        return None
+
+    def __contains__(self, template_id):
+        return self._locate(int(template_id)) is not None
+
+    def ids(self):
+        return [self._index_row(i)[0] for i in range(self.count)]
+
+    def raw(self, template_id):
+        """Encoded bytes of one entry, or None."""
+        row = self._locate(int(template_id))
+        if row is None:
+            return None
+        return self._map[row[1]:row[1] + row[2]]
+
+    def get(self, template_id):
+        """
+        Decoded entry: template_id, title, tags, version_id, version_number,
+        body_hash, body, variables, segments (literal/placeholder alternating).
+        """
+        data = self.raw(template_id)
+        return json.loads(data) if data is not None else None
+
+    def render(self, template_id, values=None):
+        """Render with the execution endpoint's {{name}} rules; KeyError for unknown templates."""
+        entry = self.get(template_id)
+        if entry is None:
+            raise KeyError(template_id)
+        values = values or {}
+        parts = []
+        for i, segment in enumerate(entry['segments']):
+            if i % 2 == 0:
+                parts.append(segment)
+            elif segment in values:
+                parts.append(str(values[segment]))
+            else:
+                parts.append('{{%s}}' % segment)
+        return ''.join(parts)
@@ -0,0 +1,33 @@
+"""
+Celery tasks for prompts
+"""
+import time
+from celery import shared_task
+from django.core.cache import cache
+from apps.prompts.authentication import APIKeyAuthentication
+from apps.prompts.services.snapshot_service import REBUILD_PENDING_KEY, SnapshotService
+
+
+@shared_task
+def rebuild_prompt_snapshot():
+    """
+    Incrementally rebuild the catalog snapshot on this worker's host, and
+    ask every other host to do the same
+    """
+    # Cleared first so a write landing during the build queues another one
+    cache.delete(REBUILD_PENDING_KEY)
+    requested_at = time.time()
+    SnapshotService.broadcast_rebuild(requested_at)
+    result = SnapshotService.refresh(requested_at)
+    if result is None:
+        return {'skipped': True}
+    written, recompiled = result
+    return {'entries': written, 'recompiled': recompiled}
+
+
+@shared_task
+def flush_api_key_usage():
+    """
+    Write batched API key uses to APIKey.last_used_at
+    """
+    return APIKeyAuthentication.flush_usage()
@@ -3,7 +3,7 @@ URLs for prompts app
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, TagViewSet, PromptTemplateViewSet, PromptVersionViewSet, PromptVariantViewSet, APIKeyViewSet
+from .views import CategoryViewSet, TagViewSet, PromptTemplateViewSet, PromptVersionViewSet, PromptVariantViewSet, APIKeyViewSet, TypeaheadViewSet
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
@@ -12,6 +12,7 @@ router.register(r'templates', PromptTemplateViewSet, basename='template')
 router.register(r'versions', PromptVersionViewSet, basename='version')
 router.register(r'variants', PromptVariantViewSet, basename='variant')
 router.register(r'api-keys', APIKeyViewSet, basename='api-key')
+router.register(r'typeahead', TypeaheadViewSet, basename='typeahead')
 
 urlpatterns = [
     path('', include(router.urls)),
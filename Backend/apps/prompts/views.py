@@ -3,21 +3,41 @@ Views for prompts API
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+import hashlib
+from psycopg2.errorcodes import FOREIGN_KEY_VIOLATION
+from urllib.parse import urlencode
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Count, Max
 from django.utils import timezone
 
+from .filters import TemplateOrderingFilter, TemplateSearchFilter
 from .models import Category, Tag, PromptTemplate, PromptVersion, PromptVariant, APIKey
+from .repositories.prompt_repository import PromptRepository
+from .services.bulk_service import BulkTemplateService
+from .services.search_service import SearchService
+from .services.taxonomy_service import TaxonomyService
+from .services.version_service import VersionService
 from .serializers import (
     CategorySerializer, TagSerializer, PromptTemplateSerializer, PromptTemplateDetailSerializer,
     PromptVersionSerializer, PromptVariantSerializer, PromptVersionCreateSerializer,
-    PromptVariantCreateSerializer, PromptTemplateCreateSerializer, APIKeySerializer
+    PromptVariantCreateSerializer, PromptTemplateCreateSerializer, APIKeySerializer,
+    PromptVersionSummarySerializer, PromptTemplateLookupSerializer, TemplateLookupSerializer,
+    TemplateBulkOperationSerializer
 )
+from common.cache import CachedResponseMixin, get_versions
+from common.conditional import ConditionalGetMixin
+from common.pagination import VersionCursorPagination
+from common.params import parse_id
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing categories
     """
@@ -28,8 +48,11 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
 
+    def get_cache_namespaces(self):
+        return ['categories']
 
-class TagViewSet(viewsets.ModelViewSet):
+
+class TagViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tags
     """
@@ -40,17 +63,77 @@ class TagViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
 
+    def get_cache_namespaces(self):
+        return ['tags']
+
+
+class TypeaheadViewSet(viewsets.ViewSet):
+    """
+    Autocomplete over tag names, category names and template titles.
+    ?q=<text>&kind=tag,category,template&limit=10
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response([])
+        kinds = [k.strip() for k in request.query_params.get('kind', '').split(',') if k.strip()]
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, django_settings.TYPEAHEAD_MAX_RESULTS))
+        return Response(SearchService.typeahead(text, kinds=kinds or None, limit=limit))
 
-class PromptTemplateViewSet(viewsets.ModelViewSet):
+
+class PromptTemplateViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing prompt templates
     """
-    queryset = PromptTemplate.objects.all()
+    queryset = PromptTemplate.objects.defer('search_vector')
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TemplateSearchFilter, TemplateOrderingFilter]
     filterset_fields = ['status', 'category']
-    search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'updated_at', 'title']
+    ordering_fields = ['created_at', 'updated_at', 'title', *TemplateOrderingFilter.USAGE_FIELDS]
+    # Query params that do not change which templates match
+    FACET_IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'facets'}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.annotate(versions_count=Count('versions'))
+        return queryset
+
+    def get_conditional_validators(self):
+        """
+        updated_at is moved forward by every change to the template, its
+        versions, variants and tags (see signals); tag/category renames bump
+        the taxonomy namespace. The usage counters change with executions,
+        which bump the template's own namespace (last_executed_at alone can
+        stay put, e.g. for an execution that started before the latest one).
+        """
+        if self.action == 'retrieve':
+            try:
+                pk = int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            except ValueError:
+                return None
+            row = PromptTemplate.objects.filter(pk=pk).values_list('updated_at', 'last_executed_at').first()
+            if row is None:
+                return None
+            last_modified = max(filter(None, row))
+            return (last_modified.isoformat(), *get_versions('taxonomy', f'template:{pk}')), last_modified
+        if self.action == 'list':
+            # Every template write bumps these namespaces, and executions bump
+            # template-usage at most once a minute (see TemplateUsageService),
+            # so list polls are validated without touching the database (ETag only)
+            return get_versions('templates', 'taxonomy', 'template-usage'), None
+        return None
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return [f"template:{self.kwargs[self.lookup_url_kwarg or self.lookup_field]}", 'taxonomy']
+        return ['templates', 'taxonomy', 'template-usage']
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -59,12 +142,52 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
             return PromptTemplateCreateSerializer
         return PromptTemplateSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Standard paginated list. With ?facets=true the response also carries
+        status/category/tag counts for the active filter set.
+        """
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:  # e.g. 304 from the conditional check
+            return response
+        if request.query_params.get('facets', '').lower() in ('1', 'true', 'yes') and isinstance(response.data, dict):
+            response.data['facets'] = self._get_facets(request)
+        return response
+
+    def _get_facets(self, request):
+        """Facet counts for the current filters, cached briefly per filter signature."""
+        signature = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.FACET_IGNORED_PARAMS
+            for value in values
+        )
+        cache_key = 'template-facets:' + hashlib.sha1(urlencode(signature).encode()).hexdigest()
+        facets = cache.get(cache_key)
+        if facets is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            facets = PromptRepository.get_facet_counts(queryset)
+            cache.set(cache_key, facets, django_settings.FACET_CACHE_TTL)
+        return facets
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     def perform_update(self, serializer):
         serializer.save()
 
+    def handle_exception(self, exc):
+        # Tag and category ids come from per-process name caches, which can
+        # still hold a row another worker deleted; forget them so a retry
+        # resolves every name again
+        if isinstance(exc, IntegrityError) and getattr(exc.__cause__, 'pgcode', None) == FOREIGN_KEY_VIOLATION:
+            TaxonomyService.clear_caches()
+            return Response(
+                {'error': 'A tag or category was deleted while saving; please retry.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return super().handle_exception(exc)
+
     @action(detail=True, methods=['post'])
     def archive(self, request, pk=None):
         """
@@ -90,12 +213,98 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def versions(self, request, pk=None):
         """
-        List all versions for a template, newest first.
+        Cursor-paginated version history, newest first. Entries are summaries
+        (no body) unless ?include=content is given.
         """
         template = self.get_object()
-        versions = template.versions.order_by('-version_number')
-        serializer = PromptVersionSerializer(versions, many=True)
-        return Response(serializer.data)
+        versions = template.versions.select_related('blob', 'created_by')
+        if request.query_params.get('include') == 'content':
+            versions = versions.prefetch_related('variants__blob')
+            serializer_class = PromptVersionSerializer
+        else:
+            serializer_class = PromptVersionSummarySerializer
+        paginator = VersionCursorPagination()
+        page = paginator.paginate_queryset(versions, request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+    @action(detail=False, methods=['post'], url_path='lookup')
+    def lookup(self, request):
+        """
+        Resolve many templates in one request.
+        {"keys": [{"id": 4}, {"id": 9, "version": 2}, {"title": "...", "owner": "<username>"}]}
+        Results come back in key order, each with the template and its current
+        (or pinned) version, or an error.
+        """
+        payload = TemplateLookupSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        keys = payload.validated_data['keys']
+        results = []
+        for key, (template, version, error) in zip(keys, PromptRepository.bulk_lookup(keys)):
+            item = {'key': key}
+            if template is not None:
+                item['template'] = PromptTemplateLookupSerializer(template).data
+            if version is not None:
+                item['version'] = PromptVersionSerializer(version).data
+            if error:
+                item['error'] = error
+            results.append(item)
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Apply one operation to many templates.
+        {"ids": [...]} or {"filter": {"status", "category", "tag", "search", "mine"}},
+        plus "operation": archive | activate | set_category | add_tags | remove_tags | set_tags
+        and "category" / "tags" (ids or names) where the operation needs them.
+        Non-staff users only reach their own templates.
+        """
+        payload = TemplateBulkOperationSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+
+        queryset = PromptTemplate.objects.all()
+        # Only staff may act on other users' templates
+        if not request.user.is_staff:
+            queryset = queryset.filter(created_by=request.user)
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        else:
+            criteria = data['filter']
+            try:
+                category = int(criteria['category']) if criteria.get('category') else None
+                tag = int(criteria['tag']) if criteria.get('tag') else None
+            except (TypeError, ValueError):
+                return Response({'error': 'filter.category and filter.tag must be ids.'}, status=status.HTTP_400_BAD_REQUEST)
+            if criteria.get('status'):
+                queryset = queryset.filter(status=str(criteria['status']).lower())
+            if category:
+                queryset = queryset.filter(category_id=category)
+            if tag:
+                queryset = queryset.filter(tags__id=tag).distinct()
+            if criteria.get('search'):
+                queryset = SearchService.search(queryset, criteria['search'])
+            if criteria.get('mine'):
+                queryset = queryset.filter(created_by=request.user)
+
+        matched = queryset.count()
+        if matched > django_settings.BULK_OPERATION_MAX_TEMPLATES:
+            return Response(
+                {'error': f'{matched} templates match; at most {django_settings.BULK_OPERATION_MAX_TEMPLATES} per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        category_id = TaxonomyService.resolve_category(data.get('category')) if 'category' in data else None
+        tag_ids = TaxonomyService.resolve_tags(data.get('tags', []))
+        result = BulkTemplateService.apply(
+            queryset, data['operation'], request.user,
+            category_id=category_id, tag_ids=tag_ids,
+            request_meta={
+                'ip_address': request.META.get('REMOTE_ADDR'),
+                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+            },
+        )
+        return Response(result)
 
     @action(detail=False, methods=['get'], url_path='export')
     def export(self, request):
@@ -103,7 +312,8 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
         templates = (
             PromptTemplate.objects
             .filter(created_by=request.user)
-            .prefetch_related('versions', 'tags', 'category')
+            .select_related('category')
+            .prefetch_related('tags')
         )
         prompts = []
         for t in templates:
@@ -134,6 +344,9 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
             )
         imported = 0
         skipped = 0
+        # Every category and tag name in the payload, resolved in a few queries
+        category_pks = TaxonomyService.resolve_names(Category, [str(p['category']) for p in data['prompts'] if p.get('category')])
+        tag_pks = TaxonomyService.resolve_names(Tag, [str(name) for p in data['prompts'] for name in p.get('tags', [])])
         for p in data['prompts']:
             title = (p.get('title') or '').strip()
             if not title:
@@ -142,19 +355,15 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
             if PromptTemplate.objects.filter(title=title, created_by=request.user).exists():
                 skipped += 1
                 continue
-            category = None
-            if p.get('category'):
-                category, _ = Category.objects.get_or_create(name=p['category'])
             template = PromptTemplate.objects.create(
                 title=title,
                 description=p.get('description', ''),
-                category=category,
+                category_id=category_pks.get(str(p['category'])) if p.get('category') else None,
                 status=p.get('status', PromptTemplate.STATUS_ACTIVE),
                 created_by=request.user,
             )
-            for tag_name in p.get('tags', []):
-                tag, _ = Tag.objects.get_or_create(name=tag_name)
-                template.tags.add(tag)
+            if p.get('tags'):
+                template.tags.add(*{tag_pks[str(name)] for name in p['tags']})
             content = p.get('content', '')
             if content:
                 PromptVersion.objects.create(
@@ -187,11 +396,11 @@ class APIKeyViewSet(viewsets.ModelViewSet):
         instance._raw_key = raw_key  # attached for this response only
 
 
-class PromptVersionViewSet(viewsets.ModelViewSet):
+class PromptVersionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing prompt versions
     """
-    queryset = PromptVersion.objects.all()
+    queryset = PromptVersion.objects.select_related('blob', 'created_by').prefetch_related('variants__blob')
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['version_number', 'created_at']
@@ -205,9 +414,39 @@ class PromptVersionViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         template_id = self.request.query_params.get('template')
         if template_id:
-            queryset = queryset.filter(template_id=template_id)
+            if parse_id(template_id) is None:
+                raise ValidationError({'template': 'Must be an id.'})
+            queryset = queryset.filter(template_id=parse_id(template_id))
+        version_number = self.request.query_params.get('version_number')
+        if version_number:
+            if parse_id(version_number) is None:
+                raise ValidationError({'version_number': 'Must be a positive integer.'})
+            queryset = queryset.filter(version_number=parse_id(version_number))
         return queryset
 
+    def get_conditional_validators(self):
+        """
+        Versions are immutable apart from notes and variants, both of which
+        move the template's updated_at forward.
+        """
+        if self.action == 'retrieve':
+            try:
+                pk = int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            except ValueError:
+                return None
+            row = PromptVersion.objects.filter(pk=pk).values('blob_id', 'template__updated_at').first()
+            if row is None:
+                return None
+            last_modified = row['template__updated_at']
+            return (row['blob_id'], last_modified.isoformat()), last_modified
+        if self.action == 'list':
+            state = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+                last_modified=Max('template__updated_at'), count=Count('id'),
+            )
+            last_modified = state['last_modified']
+            return (last_modified.isoformat() if last_modified else None, state['count']), last_modified
+        return None
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
@@ -215,7 +454,8 @@ class PromptVersionViewSet(viewsets.ModelViewSet):
     def restore(self, request, pk=None):
         """
         Restore this version by creating a new version with the same body.
-        The new version becomes the latest (current) version.
+        The new version becomes the latest (current) version. The body itself
+        is not copied: the new row points at the same content-addressed blob.
         """
         version = self.get_object()
         template = version.template
@@ -224,7 +464,7 @@ class PromptVersionViewSet(viewsets.ModelViewSet):
         new_version = PromptVersion.objects.create(
             template=template,
             version_number=new_version_number,
-            body=version.body,
+            blob_id=version.blob_id,
             variables=version.variables,
             change_note=f'Restored from v{version.version_number}',
             created_by=request.user,
@@ -232,12 +472,39 @@ class PromptVersionViewSet(viewsets.ModelViewSet):
         serializer = PromptVersionSerializer(new_version)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        """
+        Line and word diff from another version of the same template to this one.
+        ?against=<version_number> (defaults to the previous version).
+        """
+        version = self.get_object()
+        against = request.query_params.get('against')
+        if against is None:
+            other = (
+                version.template.versions
+                .filter(version_number__lt=version.version_number)
+                .order_by('-version_number')
+                .first()
+            )
+            if other is None:
+                return Response(
+                    {'error': 'This is the first version; pass ?against=<version_number>.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            against = other.version_number
+        try:
+            against = int(against)
+        except ValueError:
+            return Response({'error': '"against" must be a version number.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(VersionService.compare_versions(version.template, against, version.version_number))
+
 
 class PromptVariantViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing prompt variants (A/B testing)
     """
-    queryset = PromptVariant.objects.all()
+    queryset = PromptVariant.objects.select_related('blob', 'created_by')
     serializer_class = PromptVariantSerializer
     permission_classes = [IsAuthenticated]
 
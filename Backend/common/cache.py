@@ -0,0 +1,102 @@
+"""
+Versioned cache namespaces, and a response cache built on them.
+
+A namespace has an integer version stored in the cache. Keys built from it
+change when the version is bumped, which invalidates every entry in the
+namespace at once without having to find or delete them.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+def _key(namespace):
+    return f'ns-version:{namespace}'
+
+
+def _fresh_version():
+    # Millisecond clock, so a namespace whose counter was evicted restarts
+    # above any version readers may still hold keys for
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    version = cache.get(_key(namespace))
+    if version is None:
+        cache.add(_key(namespace), _fresh_version(), None)
+        version = cache.get(_key(namespace))
+    return version
+
+
+def get_versions(*namespaces):
+    """Versions of several namespaces in one cache round-trip."""
+    keys = {_key(ns): ns for ns in namespaces}
+    found = cache.get_many(keys)
+    for key, ns in keys.items():
+        if key not in found:
+            found[key] = get_version(ns)
+    return tuple(found[_key(ns)] for ns in namespaces)
+
+
+def bump_version(*namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_key(namespace))
+        except ValueError:
+            cache.add(_key(namespace), _fresh_version(), None)
+
+
+def bump_versions_many(namespaces):
+    """
+    bump_version for many namespaces in two cache round-trips (bulk writes).
+    Concurrent bumps of the same namespace may coalesce, which is harmless:
+    either way the version moves past what readers had.
+    """
+    keys = [_key(ns) for ns in namespaces]
+    if not keys:
+        return
+    current = cache.get_many(keys)
+    fresh = _fresh_version()
+    cache.set_many({key: max(current.get(key, 0) + 1, fresh) for key in keys}, None)
+
+
+class CachedResponseMixin:
+    """
+    Cache list/retrieve response data for a viewset, keyed per user, query
+    string (filters, ordering, page) and the versions of the namespaces the
+    response depends on. Writes elsewhere bump those namespaces, so stale
+    entries are never read again and simply expire.
+
+    The view implements get_cache_namespaces(), returning the namespaces for
+    the current action, or None to bypass the cache.
+    """
+    cache_timeout = None  # defaults to settings.RESPONSE_CACHE_TTL
+
+    def get_cache_namespaces(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+    def _cached(self, handler, request, *args, **kwargs):
+        namespaces = self.get_cache_namespaces()
+        if not namespaces:
+            return handler(request, *args, **kwargs)
+        query = sorted(request.query_params.lists())
+        raw = repr((request.path, query, get_versions(*namespaces)))
+        key = 'response:{}:{}:{}:{}'.format(
+            type(self).__name__, self.action, request.user.pk, hashlib.sha1(raw.encode()).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout if self.cache_timeout is not None else settings.RESPONSE_CACHE_TTL
+            cache.set(key, response.data, timeout)
+        return response
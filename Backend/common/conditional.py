@@ -0,0 +1,47 @@
+"""
+Conditional GET support (ETag / Last-Modified) for DRF viewsets
+"""
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Add to a ModelViewSet to answer If-None-Match / If-Modified-Since on
+    list and retrieve with 304 before the queryset is serialized.
+
+    The view implements get_conditional_validators(), returning
+    (etag_parts, last_modified) for the current action — both cheap to
+    compute, e.g. from updated_at and counters — or None to skip.
+    """
+
+    def get_conditional_validators(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag_parts, last_modified = validators
+        digest = hashlib.sha1(repr((request.get_full_path(), etag_parts)).encode()).hexdigest()
+        etag = f'W/"{digest}"'
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        else:
+            response = not_modified
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
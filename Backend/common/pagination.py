@@ -1,7 +1,7 @@
 """
 Custom pagination classes
 """
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -14,3 +14,11 @@ class LargeResultsSetPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
+
+
+class VersionCursorPagination(CursorPagination):
+    """Keyset pagination over a template's version history, newest first."""
+    ordering = '-version_number'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
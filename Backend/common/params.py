@@ -0,0 +1,18 @@
+"""
+Query parameter parsing helpers
+"""
+
+# Largest value a bigint primary key column can hold
+BIGINT_MAX = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """`value` as a positive integer that fits a bigint column, or None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    # isdecimal, unlike isdigit, rejects characters int() cannot parse, such as '²'
+    if not value.isdecimal():
+        return None
+    number = int(value)
+    return number if 0 < number <= BIGINT_MAX else None
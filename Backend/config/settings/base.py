@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -123,6 +124,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.prompts.authentication.APIKeyAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -151,6 +153,82 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'flush-api-key-usage': {
+        'task': 'apps.prompts.tasks.flush_api_key_usage',
+        'schedule': 60.0,
+    },
+    'flush-template-usage-version': {
+        'task': 'apps.analytics.tasks.flush_template_usage_version',
+        'schedule': 60.0,
+    },
+    'persist-distinct-counts': {
+        'task': 'apps.analytics.tasks.persist_distinct_counts',
+        'schedule': 600.0,
+    },
+    'reconcile-live-metrics': {
+        'task': 'apps.analytics.tasks.reconcile_live_metrics',
+        'schedule': 60.0,
+    },
+    'rollup-template-analytics': {
+        'task': 'apps.analytics.tasks.rollup_template_analytics',
+        'schedule': 300.0,
+    },
+}
+
+# Cache (shared by all web and Celery workers)
+REDIS_URL = env('REDIS_URL', default='redis://localhost:6379/0')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_URL', default=REDIS_URL),
+        'KEY_PREFIX': 'prompt-library',
+        'TIMEOUT': 300,
+    }
+}
+RESPONSE_CACHE_TTL = env.int('RESPONSE_CACHE_TTL', default=600)  # seconds; catalog read endpoints
+
+# Prompt library
+NAME_CACHE_TTL = env.int('NAME_CACHE_TTL', default=300)  # seconds; tag/category name -> id maps
+TYPEAHEAD_MAX_RESULTS = 50
+FACET_CACHE_TTL = env.int('FACET_CACHE_TTL', default=30)  # seconds
+TEMPLATE_LOOKUP_MAX_KEYS = 200  # per bulk lookup request
+BULK_OPERATION_MAX_TEMPLATES = env.int('BULK_OPERATION_MAX_TEMPLATES', default=10000)
+# Store superseded version bodies as line deltas against the next version
+PROMPT_DELTA_STORAGE = env.bool('PROMPT_DELTA_STORAGE', default=False)
+PROMPT_SNAPSHOT_INTERVAL = env.int('PROMPT_SNAPSHOT_INTERVAL', default=20)  # every Nth version stays whole
+PROMPT_DELTA_MAX_RATIO = 0.5  # keep a body whole unless its delta is under half its size
+PROMPT_BLOB_CACHE_TTL = 60 * 60 * 24  # rebuilt bodies and diffs, keyed by immutable hashes
+# Per-process current-version cache used by executions; invalidated over pub/sub
+TEMPLATE_REGISTRY_SIZE = env.int('TEMPLATE_REGISTRY_SIZE', default=1000)
+TEMPLATE_REGISTRY_TTL = env.int('TEMPLATE_REGISTRY_TTL', default=300)  # seconds; staleness bound if pub/sub is down
+TEMPLATE_REGISTRY_CHANNEL = 'prompt-library:template-registry'
+# Memory-mappable catalog snapshot, one file per host; when set, Celery rebuilds it after
+# template changes and broadcasts the rebuild to hosts running `manage.py sync_prompt_snapshot`
+PROMPT_SNAPSHOT_PATH = env('PROMPT_SNAPSHOT_PATH', default='')
+PROMPT_SNAPSHOT_DEBOUNCE = 10  # seconds; writes within this window share one rebuild
+PROMPT_SNAPSHOT_CHANNEL = 'prompt-library:prompt-snapshot'
+# API key auth: hash -> user lookups are cached; last_used_at is flushed in bulk
+API_KEY_LOCAL_TTL = 10  # seconds; per-process, also how long a deleted key may linger elsewhere
+API_KEY_CACHE_TTL = 60  # seconds; shared cache
+API_KEY_USAGE_RESOLUTION = 60  # seconds; last_used_at granularity
+EXECUTION_STATS_CACHE_TTL = 60  # seconds; per-user dashboard numbers, also invalidated by new executions
+# Columnar execution exports: rows per server-side cursor fetch and Arrow batch; longest range per download
+EXECUTION_EXPORT_BATCH_SIZE = env.int('EXECUTION_EXPORT_BATCH_SIZE', default=20000)
+EXECUTION_EXPORT_MAX_DAYS = env.int('EXECUTION_EXPORT_MAX_DAYS', default=92)
+VARIANT_STATS_CACHE_TTL = 60  # seconds; A/B comparisons are recomputed at most this often per version
+# TemplateAnalytics rollups only take executions older than this, once their status is final
+ANALYTICS_ROLLUP_LAG = env.int('ANALYTICS_ROLLUP_LAG', default=600)  # seconds
+# Pending/running executions hold the rollup window back for at most this long, then are skipped as abandoned
+ANALYTICS_ROLLUP_MAX_IN_FLIGHT = env.int('ANALYTICS_ROLLUP_MAX_IN_FLIGHT', default=3600)  # seconds
+# Chart series: periods aggregated per query, and the most points returned per metric
+TIMESERIES_MAX_PERIODS = 5000
+TIMESERIES_MAX_POINTS = 1000
+# Per-minute execution counters in Redis for the live view; recent minutes are rebuilt from Postgres
+LIVE_METRICS_RETENTION = env.int('LIVE_METRICS_RETENTION', default=180)  # minutes
+LIVE_METRICS_RECONCILE_WINDOW = 10  # minutes
+# HyperLogLog distinct users/inputs per template and day; Redis keeps the recent days, Postgres all of them
+DISTINCT_COUNTS_REDIS_DAYS = env.int('DISTINCT_COUNTS_REDIS_DAYS', default=3)
 
 # LLM Provider Settings
 OPENAI_API_KEY = env('OPENAI_API_KEY', default='')
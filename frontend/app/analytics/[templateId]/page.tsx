@@ -27,15 +27,21 @@ export default function TemplateAnalyticsPage({ params }: { params: Promise<{ te
     },
   });
 
-  // Calculate stats
-  const totalExecutions = executions.length;
-  const completedExecutions = executions.filter((e: any) => e.status === "COMPLETED").length;
-  const failedExecutions = executions.filter((e: any) => e.status === "FAILED").length;
-  const totalTokens = executions.reduce((sum: number, e: any) => sum + (e.tokens_used || 0), 0);
-  const totalCost = executions.reduce((sum: number, e: any) => sum + parseFloat(e.cost || 0), 0);
-  const avgDuration = executions.length > 0
-    ? executions.reduce((sum: number, e: any) => sum + (e.duration_ms || 0), 0) / executions.length
-    : 0;
+  // Totals come from the daily rollups rather than the execution list
+  const { data: summary } = useQuery({
+    queryKey: ["template-analytics", templateId],
+    queryFn: async () => {
+      const response = await api.get(`/analytics/templates/${templateId}/?days=365`);
+      return response.data;
+    },
+  });
+
+  const totalExecutions = summary?.execution_count || 0;
+  const completedExecutions = summary?.success_count || 0;
+  const failedExecutions = summary?.failure_count || 0;
+  const totalTokens = summary?.total_tokens || 0;
+  const totalCost = summary?.total_cost_usd || 0;
+  const avgDuration = summary?.avg_latency_ms || 0;
 
   return (
     <div className="min-h-screen bg-gray-50">
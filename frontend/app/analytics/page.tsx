@@ -19,7 +19,7 @@ export default function AnalyticsPage() {
   const { data: topPrompts = [] } = useQuery({
     queryKey: ["top-prompts"],
     queryFn: async () => {
-      const response = await api.get("/prompts/templates/?ordering=-versions_count&limit=5");
+      const response = await api.get("/prompts/templates/?ordering=-execution_count&page_size=5");
       return response.data.results || response.data;
     },
   });
@@ -137,7 +137,7 @@ export default function AnalyticsPage() {
                       </div>
                     </div>
                     <div className="text-sm font-semibold text-gray-900">
-                      {prompt.versions_count} versions
+                      {prompt.execution_count} runs
                     </div>
                   </div>
                 ))}
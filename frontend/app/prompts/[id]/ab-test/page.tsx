@@ -10,7 +10,7 @@ import {
   ClockIcon,
 } from "@heroicons/react/24/outline";
 import { useQuery } from "@tanstack/react-query";
-import api from "@/lib/api";
+import api, { fetchAllPages } from "@/lib/api";
 import { Prompt, PromptVersion, Execution } from "@/types";
 import MarkdownRenderer from "@/components/shared/MarkdownRenderer";
 
@@ -212,7 +212,7 @@ export default function ABTestPage({ params }: { params: Promise<{ id: string }>
   });
   const { data: versions = [] } = useQuery<PromptVersion[]>({
     queryKey: ["prompt-versions", promptId],
-    queryFn: async () => (await api.get(`/prompts/templates/${promptId}/versions/`)).data,
+    queryFn: () => fetchAllPages<PromptVersion>(`/prompts/templates/${promptId}/versions/?include=content&page_size=100`),
   });
 
   const promptBody = prompt?.current_version_data?.content ?? "";
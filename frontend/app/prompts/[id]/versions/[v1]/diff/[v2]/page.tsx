@@ -20,18 +20,16 @@ export default function VersionDiffPage({
   const { data: version1, isLoading: loading1 } = useQuery<PromptVersion>({
     queryKey: ["prompt-version", promptId, v1],
     queryFn: async () => {
-      const response = await api.get(`/prompts/templates/${promptId}/versions/`);
-      const versions = response.data;
-      return versions.find((v: PromptVersion) => v.version_number === parseInt(v1));
+      const response = await api.get(`/prompts/versions/?template=${promptId}&version_number=${v1}`);
+      return response.data.results[0];
     },
   });
 
   const { data: version2, isLoading: loading2 } = useQuery<PromptVersion>({
     queryKey: ["prompt-version", promptId, v2],
     queryFn: async () => {
-      const response = await api.get(`/prompts/templates/${promptId}/versions/`);
-      const versions = response.data;
-      return versions.find((v: PromptVersion) => v.version_number === parseInt(v2));
+      const response = await api.get(`/prompts/versions/?template=${promptId}&version_number=${v2}`);
+      return response.data.results[0];
     },
   });
 
@@ -4,7 +4,7 @@ import { use, useState } from "react";
 import { useRouter } from "next/navigation";
 import { ArrowLeftIcon, EyeIcon, ArrowUturnLeftIcon, XMarkIcon } from "@heroicons/react/24/outline";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
-import api from "@/lib/api";
+import api, { fetchAllPages } from "@/lib/api";
 import { PromptVersion } from "@/types";
 import { safeFormatDistanceToNow, safeFormat } from "@/lib/dateUtils";
 
@@ -19,10 +19,7 @@ export default function VersionHistoryPage({ params }: { params: Promise<{ id: s
 
   const { data: versions = [], isLoading } = useQuery<PromptVersion[]>({
     queryKey: ["prompt-versions", promptId],
-    queryFn: async () => {
-      const response = await api.get(`/prompts/templates/${promptId}/versions/`);
-      return response.data;
-    },
+    queryFn: () => fetchAllPages<PromptVersion>(`/prompts/templates/${promptId}/versions/?include=content&page_size=100`),
   });
 
   const handleRestore = async (version: PromptVersion) => {
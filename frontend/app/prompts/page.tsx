@@ -118,6 +118,9 @@ export default function PromptsPage() {
               <option value="-created_at">Recently Created</option>
               <option value="title">Name (A-Z)</option>
               <option value="-title">Name (Z-A)</option>
+              <option value="-execution_count">Most Used</option>
+              <option value="-last_executed_at">Recently Used</option>
+              <option value="-total_cost">Most Expensive</option>
             </select>
           </div>
         </div>
@@ -32,4 +32,16 @@ api.interceptors.response.use(
   }
 );
 
+// Follow a paginated endpoint's `next` links and return every result
+export async function fetchAllPages<T>(url: string): Promise<T[]> {
+  const results: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const response: { data: { results: T[]; next: string | null } } = await api.get(next);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+}
+
 export default api;
@@ -0,0 +1,18 @@
+"""
+Python client for the Prompt Library API
+"""
+from .cache import CachedTemplate, TemplateCache
+from .client import PromptLibraryClient
+from .exceptions import APIError, AuthenticationError, NotFoundError, PromptLibraryError
+from .render import render
+
+__all__ = [
+    'PromptLibraryClient',
+    'CachedTemplate',
+    'TemplateCache',
+    'render',
+    'PromptLibraryError',
+    'APIError',
+    'AuthenticationError',
+    'NotFoundError',
+]
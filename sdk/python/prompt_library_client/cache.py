@@ -0,0 +1,120 @@
+"""
+In-memory and on-disk cache of templates
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .render import compile_body, render_segments
+
+logger = logging.getLogger(__name__)
+
+
+class CachedTemplate:
+    """A template response plus its validator and pre-compiled current body."""
+
+    def __init__(self, data, etag=None, fetched_at=None):
+        self.data = data
+        self.etag = etag
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        version = data.get('current_version_data') or {}
+        self.body = version.get('content', '')
+        self.variables = version.get('variables', [])
+        self.segments = compile_body(self.body)
+
+    @property
+    def id(self):
+        return self.data['id']
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def render(self, values=None):
+        return render_segments(self.segments, values)
+
+    def to_json(self):
+        return {'data': self.data, 'etag': self.etag, 'fetched_at': self.fetched_at}
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls(payload['data'], payload.get('etag'), payload.get('fetched_at'))
+
+
+class TemplateCache:
+    """
+    Thread-safe map of template id -> CachedTemplate, mirrored to one JSON
+    file per template under `directory` (when given) so a restarted process
+    can render before the API answers.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, template_id):
+        return os.path.join(self.directory, f'template-{template_id}.json')
+
+    def get(self, template_id):
+        with self._lock:
+            entry = self._entries.get(template_id)
+        if entry is None and self.directory:
+            entry = self._read(template_id)
+            if entry is not None:
+                with self._lock:
+                    entry = self._entries.setdefault(template_id, entry)
+        return entry
+
+    def put(self, entry):
+        with self._lock:
+            self._entries[entry.id] = entry
+        if self.directory:
+            self._write(entry)
+
+    def touch(self, template_id):
+        """Mark an entry fresh after a 304."""
+        with self._lock:
+            entry = self._entries.get(template_id)
+            if entry is not None:
+                entry.fetched_at = time.time()
+        if entry is not None and self.directory:
+            self._write(entry)
+
+    def discard(self, template_id):
+        with self._lock:
+            self._entries.pop(template_id, None)
+        if self.directory:
+            try:
+                os.remove(self._path(template_id))
+            except FileNotFoundError:
+                pass
+
+    def ids(self):
+        with self._lock:
+            return list(self._entries)
+
+    def _read(self, template_id):
+        try:
+            with open(self._path(template_id), encoding='utf-8') as f:
+                return CachedTemplate.from_json(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            logger.warning('Ignoring unreadable cache file for template %s', template_id, exc_info=True)
+            return None
+
+    def _write(self, entry):
+        # Write then rename, so readers never see a partial file
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry.to_json(), f)
+            os.replace(tmp, self._path(entry.id))
+        except OSError:
+            logger.warning('Could not write cache file for template %s', entry.id, exc_info=True)
@@ -0,0 +1,269 @@
+"""
+Client for the Prompt Library REST API
+"""
+import logging
+import os
+import threading
+
+import requests
+
+from .cache import CachedTemplate, TemplateCache
+from .exceptions import APIError, AuthenticationError, NotFoundError, PromptLibraryError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'prompt-library')
+
+
+class PromptLibraryClient:
+    """
+    Thin wrapper over the API plus a local template cache.
+
+    Authenticate with `api_key`, an existing JWT `access_token`, or
+    `username`/`password` (tokens are obtained and refreshed automatically).
+
+    Templates used through get_template()/render() are cached in memory and,
+    unless cache_dir=None, on disk. An entry younger than `ttl` seconds is
+    served without a request; an older one is still served immediately and
+    revalidated in the background with If-None-Match (a 304 costs no body).
+    If the API is unreachable, cached entries keep being served for up to
+    `max_stale` seconds.
+    """
+
+    def __init__(self, base_url, api_key=None, access_token=None, username=None, password=None,
+                 ttl=60, max_stale=24 * 60 * 60, cache_dir=DEFAULT_CACHE_DIR,
+                 background_refresh=True, refresh_interval=None, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.access_token = access_token
+        self.refresh_token = None
+        self.username = username
+        self.password = password
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.cache = TemplateCache(cache_dir)
+        self.background_refresh = background_refresh
+        self.refresh_interval = refresh_interval if refresh_interval is not None else ttl
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    # -- HTTP --
+
+    def _url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/api/{path.lstrip('/')}"
+
+    def _auth_headers(self):
+        if self.api_key:
+            return {'Authorization': f'Api-Key {self.api_key}'}
+        if self.access_token is None and self.username:
+            self._obtain_token()
+        if self.access_token:
+            return {'Authorization': f'Bearer {self.access_token}'}
+        return {}
+
+    def _obtain_token(self):
+        response = self.session.post(
+            self._url('token/'), json={'username': self.username, 'password': self.password}, timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise AuthenticationError(response.status_code, response.text)
+        tokens = response.json()
+        self.access_token = tokens['access']
+        self.refresh_token = tokens.get('refresh')
+
+    def _refresh_access_token(self):
+        if self.refresh_token:
+            response = self.session.post(
+                self._url('token/refresh/'), json={'refresh': self.refresh_token}, timeout=self.timeout,
+            )
+            if response.status_code == 200:
+                self.access_token = response.json()['access']
+                return True
+        if self.username:
+            self._obtain_token()
+            return True
+        return False
+
+    def request(self, method, path, headers=None, **kwargs):
+        """Send a request; returns the Response for 2xx and 304, raises APIError otherwise."""
+        kwargs.setdefault('timeout', self.timeout)
+        all_headers = {**self._auth_headers(), **(headers or {})}
+        response = self.session.request(method, self._url(path), headers=all_headers, **kwargs)
+        if response.status_code == 401 and not self.api_key and self._refresh_access_token():
+            all_headers.update(self._auth_headers())
+            response = self.session.request(method, self._url(path), headers=all_headers, **kwargs)
+        if response.status_code < 300 or response.status_code == 304:
+            return response
+        try:
+            detail = response.json()
+        except ValueError:
+            detail = response.text
+        if response.status_code == 404:
+            raise NotFoundError(404, detail)
+        if response.status_code in (401, 403):
+            raise AuthenticationError(response.status_code, detail)
+        raise APIError(response.status_code, detail)
+
+    def _get(self, path, **params):
+        return self.request('GET', path, params=params or None).json()
+
+    def _iterate(self, path, **params):
+        """Yield results across page-number or cursor pages."""
+        page = self._get(path, **params)
+        while True:
+            if isinstance(page, list):
+                yield from page
+                return
+            yield from page.get('results', [])
+            if not page.get('next'):
+                return
+            page = self.request('GET', page['next']).json()
+
+    # -- templates and versions --
+
+    def list_templates(self, **filters):
+        """Iterate templates; filters are the list endpoint's query params (status, category, search, ...)."""
+        return self._iterate('prompts/templates/', **filters)
+
+    def fetch_template(self, template_id):
+        """Fetch a template from the API, bypassing the cache."""
+        return self._get(f'prompts/templates/{template_id}/')
+
+    def lookup(self, keys):
+        """Resolve many templates in one request; see POST /api/prompts/templates/lookup/."""
+        return self.request('POST', 'prompts/templates/lookup/', json={'keys': keys}).json()['results']
+
+    def list_versions(self, template_id, include_content=False):
+        """Iterate a template's versions, newest first."""
+        params = {'include': 'content'} if include_content else {}
+        return self._iterate(f'prompts/templates/{template_id}/versions/', **params)
+
+    def get_version(self, version_id):
+        return self._get(f'prompts/versions/{version_id}/')
+
+    def diff_versions(self, version_id, against=None):
+        params = {'against': against} if against is not None else {}
+        return self._get(f'prompts/versions/{version_id}/diff/', **params)
+
+    # -- executions --
+
+    def execute(self, template_id, provider, model='', variables=None):
+        """Run a template's current version on a provider; returns the execution record."""
+        payload = {
+            'prompt': template_id,
+            'provider': provider,
+            'model': model,
+            'input_variables': variables or {},
+        }
+        return self.request('POST', 'executions/', json=payload).json()
+
+    # -- cached templates --
+
+    def get_template(self, template_id):
+        """Return the CachedTemplate for a template, fetching or revalidating as needed."""
+        entry = self.cache.get(template_id)
+        if entry is None:
+            return self._fetch_into_cache(template_id)
+        if entry.age < self.ttl:
+            return entry
+        if self.background_refresh and entry.age < self.max_stale:
+            self._ensure_refresher()
+            self._wake.set()
+            return entry
+        try:
+            fresh = self.revalidate(template_id)
+        except (requests.RequestException, APIError):
+            return self._stale_or_raise(entry)
+        if fresh is None:
+            raise NotFoundError(404, f'Template {template_id} not found.')
+        return fresh
+
+    def render(self, template_id, variables=None):
+        """Render a template's current version locally."""
+        return self.get_template(template_id).render(variables)
+
+    def prefetch(self, template_ids):
+        """Warm the cache for several templates with one bulk lookup."""
+        results = self.lookup([{'id': template_id} for template_id in template_ids])
+        for item in results:
+            if 'template' not in item or 'version' not in item:
+                continue
+            data = dict(item['template'], current_version_data=item['version'])
+            self.cache.put(CachedTemplate(data))
+
+    def revalidate(self, template_id):
+        """
+        Conditional GET for one cached template. Returns the fresh entry, or
+        None when the template no longer exists (it is dropped from the cache).
+        """
+        entry = self.cache.get(template_id)
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else {}
+        try:
+            response = self.request('GET', f'prompts/templates/{template_id}/', headers=headers)
+        except NotFoundError:
+            self.cache.discard(template_id)
+            return None
+        if response.status_code == 304:
+            self.cache.touch(template_id)
+            return self.cache.get(template_id)
+        entry = CachedTemplate(response.json(), response.headers.get('ETag'))
+        self.cache.put(entry)
+        return entry
+
+    def _fetch_into_cache(self, template_id):
+        entry = self.revalidate(template_id)
+        if entry is None:
+            raise NotFoundError(404, f'Template {template_id} not found.')
+        return entry
+
+    def _stale_or_raise(self, entry):
+        if entry.age < self.max_stale:
+            logger.warning('Serving cached template %s (%.0fs old); API unavailable', entry.id, entry.age)
+            return entry
+        raise PromptLibraryError(f'Template {entry.id} is too stale to serve and the API is unavailable.')
+
+    # -- background refresh --
+
+    def _ensure_refresher(self):
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name='prompt-library-refresh', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            for template_id in self.cache.ids():
+                entry = self.cache.get(template_id)
+                if entry is None or entry.age < self.ttl:
+                    continue
+                try:
+                    self.revalidate(template_id)
+                except (requests.RequestException, APIError):
+                    logger.warning('Background refresh of template %s failed', template_id, exc_info=True)
+
+    def start_background_refresh(self):
+        """Keep every cached template revalidated every `refresh_interval` seconds."""
+        self._ensure_refresher()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=self.timeout)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
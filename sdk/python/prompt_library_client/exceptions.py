@@ -0,0 +1,22 @@
+"""
+Errors raised by the client
+"""
+
+
+class PromptLibraryError(Exception):
+    """Base error for the client."""
+
+
+class APIError(PromptLibraryError):
+    def __init__(self, status_code, detail):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class NotFoundError(APIError):
+    pass
+
+
+class AuthenticationError(APIError):
+    pass
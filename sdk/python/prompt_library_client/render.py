@@ -0,0 +1,33 @@
+"""
+Local rendering with the server's {{variable}} semantics
+"""
+import re
+
+PLACEHOLDER_RE = re.compile(r'\{\{([^{}]+)\}\}')
+
+
+def compile_body(body):
+    """Split a body into literal (even indexes) and placeholder (odd indexes) segments."""
+    return PLACEHOLDER_RE.split(body)
+
+
+def render_segments(segments, values=None):
+    """
+    Substitute {{name}} placeholders as POST /api/executions/ does: names are
+    matched exactly, values are str()-ed, and names without a value are left
+    as written.
+    """
+    values = values or {}
+    parts = []
+    for i, segment in enumerate(segments):
+        if i % 2 == 0:
+            parts.append(segment)
+        elif segment in values:
+            parts.append(str(values[segment]))
+        else:
+            parts.append('{{%s}}' % segment)
+    return ''.join(parts)
+
+
+def render(body, values=None):
+    return render_segments(compile_body(body), values)